@@ -0,0 +1,39 @@
+"""
+Synthetic lecture audio for benchmarks.
+Generates speech-like audio (a tone with pauses mixed with pink noise) with
+FFmpeg's lavfi sources, so benchmarks run offline without real recordings.
+"""
+import os
+import subprocess
+
+
+def generate_lecture_audio(output_path: str, minutes: float, sample_rate: int = 48000, channels: int = 2) -> str:
+    """
+    Write `minutes` of synthetic audio to output_path. The container/codec is
+    picked by FFmpeg from the file extension (.wav, .mp3, .m4a, ...).
+    The defaults mimic a typical 48 kHz stereo recording.
+    """
+    if os.path.exists(output_path):
+        return output_path
+
+    duration = int(minutes * 60)
+    channel_layout = "stereo" if channels == 2 else "mono"
+
+    # A 220 Hz tone gated on/off every few seconds (like phrases and pauses) over low noise
+    voice = f"sine=frequency=220:sample_rate={sample_rate}:duration={duration}"
+    noise = f"anoisesrc=color=pink:amplitude=0.05:sample_rate={sample_rate}:duration={duration}"
+    filters = (
+        "[0:a]volume='if(lt(mod(t,7),5),0.6,0)':eval=frame[v];"
+        f"[v][1:a]amix=inputs=2:duration=shortest,aformat=channel_layouts={channel_layout}"
+    )
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", voice,
+        "-f", "lavfi", "-i", noise,
+        "-filter_complex", filters,
+        "-ar", str(sample_rate),
+        output_path
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return output_path
@@ -0,0 +1,79 @@
+"""
+Benchmark: copy-mode segmentation vs. compaction + segmentation.
+
+Measures, for each path, the FFmpeg wall time, the bytes that would be
+uploaded and the number of Whisper requests (files over 25MB are split at the
+cuts plan_segments picks, as in process_audio_file). No API calls are made.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_compaction                    # synthetic 60 min 48 kHz stereo WAV
+    python -m benchmarks.bench_compaction --minutes 180
+    python -m benchmarks.bench_compaction path/to/lecture.mp3
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks.audio_fixtures import generate_lecture_audio
+from services.audio_service import (
+    compact_audio, plan_segments, segment_command, fit_chunk, COMPACTION_FORMATS, WHISPER_LIMIT_BYTES
+)
+
+
+def _segment(file_path: str, work_dir: str) -> tuple:
+    """Split like process_audio_file does; returns (seconds, chunk sizes)"""
+    if os.path.getsize(file_path) < WHISPER_LIMIT_BYTES:
+        return 0.0, [os.path.getsize(file_path)]
+
+    chunk_dir = tempfile.mkdtemp(dir=work_dir)
+    ext = os.path.splitext(file_path)[1] or ".mp3"
+    start = time.perf_counter()
+    subprocess.run(
+        segment_command(file_path, os.path.join(chunk_dir, f"chunk_%03d{ext}"), plan_segments(file_path)),
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for name in sorted(os.listdir(chunk_dir)):
+        fit_chunk(os.path.join(chunk_dir, name))
+    elapsed = time.perf_counter() - start
+    sizes = [os.path.getsize(os.path.join(chunk_dir, name)) for name in os.listdir(chunk_dir)]
+    return elapsed, sizes
+
+
+def _report(name: str, prep_seconds: float, split_seconds: float, sizes: list):
+    total_mb = sum(sizes) / 1024 / 1024
+    print(f"{name:<16} prep {prep_seconds:7.2f}s  split {split_seconds:6.2f}s  "
+          f"upload {total_mb:8.2f} MB  requests {len(sizes):3d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", help="Audio file to benchmark (default: synthetic WAV)")
+    parser.add_argument("--minutes", type=float, default=60, help="Length of the synthetic audio")
+    parser.add_argument("--bitrate", default="32k", help="Compaction bitrate")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_compaction_")
+    try:
+        input_path = args.input or generate_lecture_audio(
+            os.path.join(work_dir, f"lecture_{int(args.minutes)}min.wav"), args.minutes
+        )
+        print(f"🎧 Input: {input_path} ({os.path.getsize(input_path) / 1024 / 1024:.2f} MB)\n")
+
+        split_seconds, sizes = _segment(input_path, work_dir)
+        _report("copy (current)", 0.0, split_seconds, sizes)
+
+        for audio_format in COMPACTION_FORMATS:
+            start = time.perf_counter()
+            compacted = compact_audio(input_path, work_dir, audio_format, args.bitrate)
+            prep_seconds = time.perf_counter() - start
+            split_seconds, sizes = _segment(compacted, work_dir)
+            _report(f"{audio_format} {args.bitrate}", prep_seconds, split_seconds, sizes)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
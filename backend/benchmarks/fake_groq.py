@@ -0,0 +1,205 @@
+"""
+Fake Groq server for benchmarks.
+Implements the two OpenAI-compatible endpoints the app uses (audio
+transcriptions and chat completions) with configurable latency and injected
+429 / 5xx errors, so load tests run offline without spending quota.
+
+Usage (from the backend directory):
+    python -m benchmarks.fake_groq --port 8100 --chat-latency 1.5 --error-429 0.05
+Then start the app with GROQ_BASE_URL=http://127.0.0.1:8100 and any GROQ_API_KEY.
+"""
+import re
+import time
+import json
+import zlib
+import random
+import asyncio
+import argparse
+from collections import Counter
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SENTENCE = "Today we continue with the lecture and look at the main ideas in more detail."
+
+
+def _summary_text() -> str:
+    return (
+        "## Overview\n"
+        "This lecture covers the main ideas of the topic.\n\n"
+        "### Key Points\n"
+        "* The first key idea and why it matters\n"
+        "* The second key idea with an example\n"
+        "- A common mistake to avoid\n"
+    )
+
+
+def _quiz_json(prompt: str = "") -> str:
+    # As many questions as the prompt asks for, worded per prompt so quiz sections don't look like duplicates
+    match = re.search(r"(\d+) Multiple Choice", prompt)
+    count = int(match.group(1)) if match else 5
+    tag = zlib.crc32(prompt.encode()) % 10000
+    quiz = [
+        {"question": f"Question {tag}-{i + 1}?", "options": ["A", "B", "C", "D"], "answer": "A"}
+        for i in range(count)
+    ]
+    flashcards = [{"front": f"Term {tag}-{i + 1}", "back": f"Definition {i + 1}"} for i in range(count)]
+    return json.dumps({"quiz": quiz, "flashcards": flashcards})
+
+
+def create_app(whisper_latency: float = 0.5, chat_latency: float = 1.0, jitter: float = 0.2,
+               error_429: float = 0.0, error_5xx: float = 0.0, retry_after: float = 1.0,
+               first_token_latency: float = 0.2) -> FastAPI:
+    """
+    Build the fake server. Latencies are seconds per request, plus a random
+    extra of up to `jitter` times the latency. error_429 / error_5xx are the
+    fractions of requests that fail with that status. Streamed chat
+    completions send the first token after first_token_latency and finish
+    after chat_latency.
+    """
+    app = FastAPI(title="Fake Groq")
+    counts = Counter()
+
+    async def delay(latency: float):
+        await asyncio.sleep(latency + random.uniform(0, latency * jitter))
+
+    def injected_error():
+        """Return an error response for a random share of requests, or None"""
+        roll = random.random()
+        if roll < error_429:
+            counts["429"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(retry_after)},
+                content={"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            )
+        if roll < error_429 + error_5xx:
+            counts["5xx"] += 1
+            return JSONResponse(
+                status_code=random.choice([500, 502, 503]),
+                content={"error": {"message": "Internal server error", "type": "internal_server_error"}},
+            )
+        return None
+
+    @app.post("/openai/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        form = await request.form()
+        upload = form.get("file")
+        size = len(await upload.read()) if upload is not None else 0
+        counts["transcriptions"] += 1
+
+        await delay(whisper_latency)
+        error = injected_error()
+        if error:
+            return error
+
+        # About one sentence per 10 seconds of 32 kbit/s audio
+        sentences = max(1, size // (4000 * 10))
+        return {"text": " ".join([SENTENCE] * sentences)}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counts["chat_completions"] += 1
+        stream = bool(body.get("stream"))
+
+        await delay(first_token_latency if stream else chat_latency)
+        error = injected_error()
+        if error:
+            return error
+
+        is_json = (body.get("response_format") or {}).get("type") == "json_object"
+        prompt = (body.get("messages") or [{}])[-1].get("content") or ""
+        content = _quiz_json(prompt) if is_json else _summary_text()
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        prompt_tokens = prompt_chars // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        completion_id = f"chatcmpl-{random.getrandbits(64):x}"
+
+        if stream:
+            return StreamingResponse(
+                _stream_chunks(completion_id, body.get("model"), content, usage),
+                media_type="text/event-stream",
+            )
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    async def _stream_chunks(completion_id: str, model: str, content: str, usage: dict):
+        """Send the completion word by word as chat.completion.chunk events"""
+        words = re.findall(r"\S+\s*|\s+", content)
+        interval = max(0.0, chat_latency - first_token_latency) / max(1, len(words))
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(interval)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"id": completion_id, "usage": usage},
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.get("/stats")
+    def stats():
+        """Requests served and errors injected so far"""
+        return dict(counts)
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Fake server options, shared with the load test driver"""
+    parser.add_argument("--whisper-latency", type=float, default=0.5, help="Seconds per transcription request")
+    parser.add_argument("--chat-latency", type=float, default=1.0, help="Seconds per chat completion")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="Seconds to the first streamed token")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random extra latency, as a fraction")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="Fraction of requests answered with 5xx")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after header sent with 429s")
+
+
+def app_from_args(args) -> FastAPI:
+    return create_app(args.whisper_latency, args.chat_latency, args.jitter,
+                      args.error_429, args.error_5xx, args.retry_after, args.first_token_latency)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(app_from_args(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
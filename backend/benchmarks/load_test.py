@@ -0,0 +1,244 @@
+"""
+Load test for /api/transcribe, /api/summarize and /api/quiz.
+
+Starts the fake Groq server and the app (uvicorn) as subprocesses, pushes
+concurrent requests at each endpoint in turn and reports p50/p95/p99 latency
+and requests per second. Everything runs locally; the only requirement is
+FFmpeg on PATH for the synthetic audio and the app's own splitting.
+
+The spawned app has the transcript/result caches disabled and the rate
+limits raised, so the numbers measure the pipeline rather than the cache or
+the free-tier quota (use --llm-rpm etc. to benchmark under a real quota).
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 16 --requests 100 --minutes 1,10,30
+    python -m benchmarks.load_test --endpoints summarize,quiz --error-429 0.1 --chat-latency 2
+    python -m benchmarks.load_test --app-url http://127.0.0.1:8000   # already running app
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import httpx
+
+from benchmarks.audio_fixtures import generate_lecture_audio
+from benchmarks.fake_groq import add_arguments
+
+ENDPOINTS = ("transcribe", "summarize", "quiz")
+STARTUP_TIMEOUT = 60  # seconds to wait for a spawned server to answer
+REQUEST_TIMEOUT = 1800
+
+LECTURE_SENTENCES = [
+    "In this lecture we look at how the system behaves under load.",
+    "The first idea is that every request shares the same limited resources.",
+    "A queue forms when requests arrive faster than they can be served.",
+    "Latency is the time a single request takes from start to finish.",
+    "Throughput is the number of requests completed per unit of time.",
+    "Tail latency matters because users notice the slowest responses.",
+    "Caching avoids repeating work for inputs we have already seen.",
+    "Rate limits protect a shared service from being overwhelmed.",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url: str, process: subprocess.Popen):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server for {url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {STARTUP_TIMEOUT}s")
+
+
+def _start_servers(args, processes: list) -> tuple:
+    """
+    Start the fake Groq server and the app; returns (app_url, fake_url).
+    Started processes are appended to `processes` so the caller can stop them even if startup fails.
+    """
+    fake_port, app_port = _free_port(), _free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    fake = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_groq", "--port", str(fake_port),
+        "--whisper-latency", str(args.whisper_latency), "--chat-latency", str(args.chat_latency),
+        "--jitter", str(args.jitter), "--error-429", str(args.error_429),
+        "--error-5xx", str(args.error_5xx), "--retry-after", str(args.retry_after),
+        "--first-token-latency", str(args.first_token_latency),
+    ])
+    processes.append(fake)
+    _wait_until_up(f"{fake_url}/stats", fake)
+
+    env = dict(
+        os.environ,
+        GROQ_API_KEY="benchmark",
+        GROQ_BASE_URL=fake_url,
+        TRANSCRIPT_CACHE_MAX_MB="0",
+        RESULT_CACHE_MAX_ENTRIES="0",
+        LLM_RPM=str(args.llm_rpm),
+        LLM_TPM=str(args.llm_tpm),
+        WHISPER_RPM=str(args.whisper_rpm),
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    processes.append(app)
+    _wait_until_up(f"{app_url}/health", app)
+    return app_url, fake_url
+
+
+def _lecture_text(words: int) -> str:
+    """Deterministic lecture-like text of about `words` words"""
+    sentences, count, i = [], 0, 0
+    while count < words:
+        sentence = LECTURE_SENTENCES[i % len(LECTURE_SENTENCES)]
+        sentences.append(sentence)
+        count += len(sentence.split())
+        i += 1
+        if i % 5 == 0:
+            sentences.append("\n\n")
+    return " ".join(sentences)
+
+
+def _audio_files(work_dir: str, minutes: list, audio_format: str) -> list:
+    files = []
+    for length in minutes:
+        path = os.path.join(work_dir, f"lecture_{length:g}min.{audio_format}")
+        print(f"🎧 Generating {length:g} min of synthetic audio...")
+        files.append(generate_lecture_audio(path, length))
+    return files
+
+
+def _request_factory(endpoint: str, args, audio_files: list, transcript: str):
+    """Return a function that sends the i-th request for an endpoint"""
+    if endpoint == "transcribe":
+        async def send(client: httpx.AsyncClient, i: int):
+            path = audio_files[i % len(audio_files)]
+            with open(path, "rb") as f:
+                return await client.post("/api/transcribe", files={"file": (os.path.basename(path), f)})
+        return send
+
+    payload = {"transcript": transcript, "refresh": not args.cached}
+    if endpoint == "quiz":
+        payload["notes"] = ""
+
+    async def send(client: httpx.AsyncClient, i: int):
+        return await client.post(f"/api/{endpoint}", json=payload)
+    return send
+
+
+async def _run_endpoint(endpoint: str, app_url: str, send, requests: int, concurrency: int) -> dict:
+    """Send `requests` requests with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=app_url, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        async def one(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await send(client, i)
+                    outcome = response.status_code if response.status_code != 200 else None
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                if outcome is None:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[outcome] = errors.get(outcome, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {"endpoint": endpoint, "latencies": latencies, "errors": errors, "elapsed": elapsed}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+def _report(results: list):
+    print(f"\n{'endpoint':<12}{'ok':>6}{'failed':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}")
+    for r in results:
+        lat = r["latencies"]
+        failed = sum(r["errors"].values())
+        rps = len(lat) / r["elapsed"] if r["elapsed"] else 0.0
+        print(f"{r['endpoint']:<12}{len(lat):>6}{failed:>8}"
+              f"{percentile(lat, 50):>8.2f}s{percentile(lat, 95):>8.2f}s{percentile(lat, 99):>8.2f}s{rps:>9.2f}")
+        if r["errors"]:
+            print(f"{'':<12}errors: {r['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-url", help="Benchmark an already running app instead of spawning one")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated: transcribe,summarize,quiz")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per endpoint")
+    parser.add_argument("--minutes", default="1,10", help="Comma-separated lengths of the synthetic audio files")
+    parser.add_argument("--audio-format", default="mp3", help="Container for the synthetic audio")
+    parser.add_argument("--transcript-words", type=int, default=3000, help="Words in the summarize/quiz transcript")
+    parser.add_argument("--cached", action="store_true", help="Let summarize/quiz use the result cache")
+    parser.add_argument("--llm-rpm", type=int, default=100000, help="LLM_RPM for the spawned app")
+    parser.add_argument("--llm-tpm", type=int, default=100000000, help="LLM_TPM for the spawned app")
+    parser.add_argument("--whisper-rpm", type=int, default=100000, help="WHISPER_RPM for the spawned app")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    processes, fake_url = [], None
+    with tempfile.TemporaryDirectory(prefix="load_test_") as work_dir:
+        try:
+            audio_files = []
+            if "transcribe" in endpoints:
+                minutes = [float(m) for m in args.minutes.split(",")]
+                audio_files = _audio_files(work_dir, minutes, args.audio_format)
+            transcript = _lecture_text(args.transcript_words)
+
+            app_url = args.app_url
+            if not app_url:
+                print("🚀 Starting fake Groq server and app...")
+                app_url, fake_url = _start_servers(args, processes)
+
+            results = []
+            for endpoint in endpoints:
+                print(f"⏱️  {endpoint}: {args.requests} requests, concurrency {args.concurrency}")
+                send = _request_factory(endpoint, args, audio_files, transcript)
+                results.append(asyncio.run(_run_endpoint(endpoint, app_url, send, args.requests, args.concurrency)))
+
+            _report(results)
+            if fake_url:
+                print(f"\nFake Groq: {httpx.get(f'{fake_url}/stats').json()}")
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
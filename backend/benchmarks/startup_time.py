@@ -0,0 +1,83 @@
+"""
+Benchmark: cold start cost of importing the app.
+
+Imports main.py in fresh interpreters (so nothing is cached in memory) and
+reports the median and spread of the import time, plus the slowest top-level
+imports from `python -X importtime`. With --max-ms it exits with status 1
+when the median goes over the budget, so CI can catch import regressions
+(e.g. a heavy dependency imported at module level again).
+
+Usage (from the backend directory):
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --runs 10 --top 15
+    python -m benchmarks.startup_time --max-ms 600
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints how long `import main` took in milliseconds
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+
+
+def _env() -> dict:
+    # No prewarm thread or real credentials needed just to import the app
+    return dict(os.environ, STARTUP_PREWARM="false", GROQ_API_KEY=os.environ.get("GROQ_API_KEY") or "benchmark")
+
+
+def measure_import_ms() -> float:
+    """Import the app in a new interpreter and return the import time in ms"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> list:
+    """(cumulative ms, module) of the slowest imports directly under main, slowest first"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True, text=True
+    ).stderr
+
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Depth is shown as two spaces per level; keep the modules main.py imports itself
+        if not cumulative.strip().isdigit() or len(name) - len(name.lstrip()) != 3:
+            continue
+        modules.append((int(cumulative) / 1000, name.strip()))
+    modules.sort(reverse=True)
+    return modules[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list (0 to skip)")
+    parser.add_argument("--max-ms", type=float, help="Exit with status 1 if the median import time is above this")
+    args = parser.parse_args()
+
+    times = [measure_import_ms() for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(f"⏱️  import main: median {median:.0f} ms, min {min(times):.0f} ms, max {max(times):.0f} ms ({args.runs} runs)")
+
+    if args.top:
+        print(f"\n{'cumulative':>12}  module")
+        for ms, module in slowest_imports(args.top):
+            print(f"{ms:>10.1f}ms  {module}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\n❌ Median import time {median:.0f} ms is over the {args.max_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
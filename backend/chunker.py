@@ -0,0 +1,118 @@
+"""
+Text Chunker
+Splits long transcripts into chunks that fit a model's token budget,
+cutting on paragraph and sentence boundaries instead of fixed character
+offsets. Works in one pass over the text: boundaries are found once and
+each chunk is sliced out of the original string exactly once.
+"""
+import re
+
+# Rough average for English text with the Llama tokenizer
+CHARS_PER_TOKEN = 4
+
+# Input tokens per request for each model. Kept well below the context window
+# so that prompt + reply also fit the free tier tokens-per-minute limits.
+MODEL_TOKEN_BUDGETS = {
+    "llama-3.3-70b-versatile": 7500,
+    "llama-3.1-8b-instant": 7500,
+}
+DEFAULT_TOKEN_BUDGET = 4000
+
+# A blank line ends a paragraph; ., ! or ? followed by whitespace ends a sentence
+BOUNDARY_PATTERN = re.compile(r'(\s*\n\s*\n\s*)|(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate without loading a tokenizer"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def token_budget(model: str) -> int:
+    """Return the input token budget for a model"""
+    return MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+def _split_on_words(text: str, start: int, end: int, max_chars: int):
+    """Yield (start, end) spans of at most max_chars, cut at whitespace when possible"""
+    while end - start > max_chars:
+        cut = text.rfind(" ", start + 1, start + max_chars)
+        if cut == -1:
+            cut = start + max_chars  # No space at all (e.g. a URL), hard cut
+        yield start, cut
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    if start < end:
+        yield start, end
+
+
+def _units(text: str, max_chars: int):
+    """
+    Yield (start, end, ends_paragraph) spans for every sentence in the text.
+    Sentences longer than max_chars (common in caption text without
+    punctuation) are split further on word boundaries.
+    """
+    pos = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        if match.start() > pos:
+            spans = list(_split_on_words(text, pos, match.start(), max_chars))
+            for i, (start, end) in enumerate(spans):
+                yield start, end, match.group(1) is not None and i == len(spans) - 1
+        pos = match.end()
+
+    end = len(text)
+    while end > pos and text[end - 1].isspace():
+        end -= 1
+    if pos < end:
+        for start, end in _split_on_words(text, pos, end, max_chars):
+            yield start, end, False
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> list:
+    """
+    Split text into chunks of at most max_tokens (estimated).
+
+    Chunks end on a sentence boundary, preferring a paragraph break when one
+    falls in the second half of the chunk. With overlap_tokens, each chunk
+    starts with the last sentences (up to that many tokens) of the previous
+    chunk so context is not lost at the cut.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    overlap_chars = min(max(0, overlap_tokens * CHARS_PER_TOKEN), max_chars // 2)
+
+    if len(text) <= max_chars:
+        text = text.strip()
+        return [text] if text else []
+
+    units = list(_units(text, max_chars))
+    chunks = []
+    first = 0
+
+    while first < len(units):
+        chunk_start = units[first][0]
+
+        # Extend the chunk with whole sentences while they fit
+        last = first
+        paragraph_end = None
+        while last + 1 < len(units) and units[last + 1][1] - chunk_start <= max_chars:
+            if units[last][2]:
+                paragraph_end = last
+            last += 1
+
+        # Prefer ending at a paragraph break if it doesn't make the chunk too small
+        if (last + 1 < len(units) and paragraph_end is not None
+                and units[paragraph_end][1] - chunk_start >= max_chars // 2):
+            last = paragraph_end
+
+        chunks.append(text[chunk_start:units[last][1]])
+        if last + 1 >= len(units):
+            break
+
+        # Step back over trailing sentences that fit in the overlap, always moving forward
+        next_first = last + 1
+        while (next_first - 1 > first
+               and units[last][1] - units[next_first - 1][0] <= overlap_chars):
+            next_first -= 1
+        first = next_first
+
+    return chunks
@@ -1,19 +1,53 @@
 import os
+import tempfile
 from dotenv import load_dotenv
-from groq import Groq
+
+from lazy import Lazy, LazyProxy
 
 # Load environment variables
 load_dotenv()
 
 # Initialize Groq Client
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Override the API endpoint, e.g. to point at benchmarks/fake_groq.py (default: https://api.groq.com)
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+
+# Threads used to run blocking LLM calls off the event loop
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+# LLM requests allowed to wait for one of those threads before new ones get a 503
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "16"))
+# Keep-alive connections used for Groq API calls
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "32"))
+
+def _create_groq_client():
+    """Create the Groq client (groq and httpx are only imported here, on first use)"""
+    import httpx
+    from groq import Groq, DefaultHttpxClient
+
+    # One connection pool for every Groq call so requests reuse TLS connections
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_CONNECTIONS
+        )
+    )
+    # Retries are handled by the shared rate limit scheduler (see rate_limiter.py)
+    return Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, http_client=http_client, max_retries=0)
+
+# Shared by every route; the real client is created when it is first used
+_groq_client = LazyProxy(Lazy("groq", _create_groq_client))
 
 def get_groq_client():
-    """Initialize and return Groq client"""
+    """Return the shared Groq client, or None if no API key is configured"""
     if not GROQ_API_KEY or GROQ_API_KEY == "your_groq_api_key_here":
         print("WARNING: Please add your GROQ_API_KEY to the .env file")
         return None
-    return Groq(api_key=GROQ_API_KEY)
+    return _groq_client
+
+# Startup settings
+# Load groq, yt-dlp, youtube-transcript-api and FFmpeg in a background thread right after
+# startup, so the first request doesn't pay for them ("false" loads them on first use only)
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "true").lower() == "true"
 
 # CORS origins configuration
 # Allow localhost for development and all Vercel deployments
@@ -25,4 +59,136 @@ CORS_ORIGINS = [
     "https://*.vercel.app",
 ]
 
+# Audio transcription settings
+# Number of audio chunks sent to Whisper at the same time for large files
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "4"))
+
+# Transcript cache settings
+# Transcripts are cached on disk by the SHA-256 of the audio so repeat uploads skip Whisper
+TRANSCRIPT_CACHE_DIR = os.getenv(
+    "TRANSCRIPT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "transcripts")
+)
+# Maximum cache size in MB before least recently used transcripts are evicted (0 disables the cache)
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "200"))
+
+# Admission control settings
+# Requests transcribing audio (FFmpeg + Whisper) at the same time, and how many more may wait
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", "4"))
+AUDIO_QUEUE_SIZE = int(os.getenv("AUDIO_QUEUE_SIZE", "8"))
+# Requests downloading audio or fetching captions at the same time, and how many more may wait
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+DOWNLOAD_QUEUE_SIZE = int(os.getenv("DOWNLOAD_QUEUE_SIZE", "16"))
+
+# Background job settings
+# Number of transcription jobs that run at the same time
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Maximum number of jobs waiting for a worker before new submissions are rejected
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "20"))
+# How long finished jobs are kept for status polling (seconds)
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+# Where background jobs keep their audio chunks and per-chunk results so they can be resumed
+CHECKPOINT_DIR = os.getenv(
+    "CHECKPOINT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "checkpoints")
+)
+# How long an unfinished checkpoint is kept for resuming (seconds)
+CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", "86400"))
+
+# Workspace settings
+# Every request, job and batch item keeps its temp files in its own directory under WORKSPACE_DIR
+WORKSPACE_DIR = os.getenv("WORKSPACE_DIR", os.path.join(tempfile.gettempdir(), "lecture-workspaces"))
+# Most temporary disk space one workspace may use in MB (0 = no limit)
+WORKSPACE_QUOTA_MB = int(os.getenv("WORKSPACE_QUOTA_MB", "2048"))
+# Optional RAM-backed directory (e.g. /dev/shm/lecture-chunks) for FFmpeg chunk files
+WORKSPACE_CHUNK_DIR = os.getenv("WORKSPACE_CHUNK_DIR", "")
+# New work is refused with 503 while the disk holding WORKSPACE_DIR has less free space than this (MB)
+WORKSPACE_MIN_FREE_MB = int(os.getenv("WORKSPACE_MIN_FREE_MB", "1024"))
+# Live workspaces are touched on every sweep; untouched ones older than this are orphans and deleted
+WORKSPACE_ORPHAN_SECONDS = int(os.getenv("WORKSPACE_ORPHAN_SECONDS", "3600"))
+WORKSPACE_REAP_INTERVAL_SECONDS = int(os.getenv("WORKSPACE_REAP_INTERVAL_SECONDS", "300"))
+
+# Batch processing settings
+# Lectures processed at the same time across all batches (one shared budget)
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+# Maximum files or URLs in a single batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+# Maximum unfinished lectures across all batches before new batches are rejected
+BATCH_MAX_PENDING = int(os.getenv("BATCH_MAX_PENDING", "500"))
+
+# Summarization settings
+# "map_reduce" merges per-section notes into one document, "concat" joins them as-is
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "map_reduce")
+# Number of transcript sections summarized at the same time
+SUMMARY_PARALLELISM = int(os.getenv("SUMMARY_PARALLELISM", "4"))
+# Number of partial notes merged by a single reduce call
+SUMMARY_REDUCE_FAN_IN = int(os.getenv("SUMMARY_REDUCE_FAN_IN", "4"))
+
+# Quiz settings
+# "sectioned" writes questions for every part of a long lecture in parallel,
+# "single" uses one request with excerpts spread over the lecture
+QUIZ_MODE = os.getenv("QUIZ_MODE", "sectioned")
+# Number of lecture sections turned into questions at the same time
+QUIZ_PARALLELISM = int(os.getenv("QUIZ_PARALLELISM", "8"))
+# Attempts per section when the reply is not a valid quiz
+QUIZ_SECTION_ATTEMPTS = int(os.getenv("QUIZ_SECTION_ATTEMPTS", "3"))
+# Most questions (and flashcards) in a sectioned quiz; 1 per ~100 words below that
+QUIZ_MAX_QUESTIONS = int(os.getenv("QUIZ_MAX_QUESTIONS", "40"))
+
+# Audio compaction settings
+# Re-encode uploads to 16 kHz mono before transcription: "opus", "mp3" or "off"
+AUDIO_COMPACTION = os.getenv("AUDIO_COMPACTION", "opus").lower()
+# Target bitrate for the compacted audio (speech stays intelligible well below 32k)
+AUDIO_COMPACTION_BITRATE = os.getenv("AUDIO_COMPACTION_BITRATE", "32k")
+# Files smaller than this (MB) are sent as-is since re-encoding would only add latency
+AUDIO_COMPACTION_MIN_MB = float(os.getenv("AUDIO_COMPACTION_MIN_MB", "8"))
+
+# Audio segmentation settings
+# Chunks are planned to fill this share of the 25MB Whisper limit (the rest absorbs bitrate swings)
+SEGMENT_FILL_RATIO = float(os.getenv("SEGMENT_FILL_RATIO", "0.95"))
+# Seconds before each planned cut searched for a silence to cut in instead (0 = cut at the planned time)
+SEGMENT_SILENCE_SEARCH_SECONDS = float(os.getenv("SEGMENT_SILENCE_SEARCH_SECONDS", "20"))
+
+# Upload settings
+# Largest accepted audio upload in MB; bigger requests are rejected while streaming
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "500"))
+
+# Groq rate limits per model: requests per minute and tokens per minute (0 = no limit)
+# Defaults match the Groq free tier; raise them if your account has higher quotas
+GROQ_RATE_LIMITS = {
+    "llama-3.3-70b-versatile": {
+        "rpm": int(os.getenv("LLM_RPM", "30")),
+        "tpm": int(os.getenv("LLM_TPM", "12000")),
+    },
+    "whisper-large-v3": {
+        "rpm": int(os.getenv("WHISPER_RPM", "20")),
+        "tpm": 0,
+    },
+}
+# Fraction of the quota the scheduler aims for, leaving room for other clients of the same key
+RATE_LIMIT_HEADROOM = float(os.getenv("RATE_LIMIT_HEADROOM", "0.9"))
+# Attempts per Groq call before giving up on rate limit / server errors
+GROQ_MAX_ATTEMPTS = int(os.getenv("GROQ_MAX_ATTEMPTS", "4"))
+
+# Summary / quiz result cache settings
+# In-memory LRU in front of a SQLite store, keyed by transcript, model, parameters and prompt version
+RESULT_CACHE_PATH = os.getenv(
+    "RESULT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "results.sqlite3")
+)
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "256"))
+# Maximum rows kept in SQLite (0 disables the cache)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "5000"))
+
+# YouTube caption cache settings
+# Captions are cached per video id so a link shared with a class costs one Supadata request
+YOUTUBE_TRANSCRIPT_TTL_SECONDS = int(os.getenv("YOUTUBE_TRANSCRIPT_TTL_SECONDS", "86400"))
+YOUTUBE_TRANSCRIPT_CACHE_SIZE = int(os.getenv("YOUTUBE_TRANSCRIPT_CACHE_SIZE", "500"))
 
+# Outbound HTTP and YouTube caption strategy settings
+# Keep-alive connections per host in the shared requests session
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+# "hedged" starts the direct API if Supadata hasn't answered after YOUTUBE_HEDGE_DELAY_SECONDS,
+# "race" starts both at once, "sequential" only falls back after Supadata fails
+YOUTUBE_TRANSCRIPT_STRATEGY = os.getenv("YOUTUBE_TRANSCRIPT_STRATEGY", "hedged").lower()
+YOUTUBE_HEDGE_DELAY_SECONDS = float(os.getenv("YOUTUBE_HEDGE_DELAY_SECONDS", "3"))
@@ -0,0 +1,247 @@
+"""
+Executors
+Dedicated, bounded thread pools for blocking work called from async route
+handlers, one per stage: audio (FFmpeg + Whisper), download (yt-dlp and
+YouTube captions) and llm (summaries and quizzes). Blocking calls never run
+on the event loop, and a burst on one stage cannot take the threads of another.
+
+Each stage admits at most workers + queue_size requests at a time. Anything
+beyond that is refused straight away with StageSaturated (503 with a
+Retry-After header) instead of joining an ever longer queue, so requests
+that were admitted keep a bounded wait rather than all slowing down together.
+Routes admit before doing any work (e.g. before receiving an upload), so a
+refused request costs next to nothing.
+
+Background jobs and batches are exempt. They already get admission control
+when they are submitted: their own bounded pools (JOB_WORKERS/JOB_MAX_PENDING,
+BATCH_WORKERS/BATCH_MAX_PENDING) refuse new work with 503. Once accepted (202) they run on those
+threads, not the stage threads. Refusing a stage slot halfway through would
+only throw away work that was already accepted.
+"""
+import math
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.responses import JSONResponse
+
+from config import (
+    LLM_WORKERS,
+    LLM_QUEUE_SIZE,
+    AUDIO_WORKERS,
+    AUDIO_QUEUE_SIZE,
+    DOWNLOAD_WORKERS,
+    DOWNLOAD_QUEUE_SIZE,
+)
+from metrics import STAGE_ADMITTED, STAGE_REJECTED, STAGE_QUEUE_WAIT
+
+# Assumed slot time (seconds) for Retry-After before a stage has finished any work
+DEFAULT_TASK_SECONDS = 5
+# Retry-After is kept within these bounds (seconds)
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 120
+# Weight of the latest request in the running average of how long a request holds its slot
+DURATION_SMOOTHING = 0.2
+
+
+class StageSaturated(Exception):
+    """Raised when a stage has no room for more work; retry_after is in seconds"""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def saturated_response(error: StageSaturated) -> JSONResponse:
+    """503 response for a refused request, telling the client when to try again"""
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"error": str(error)},
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+class Admission:
+    """
+    A slot in a stage. It is given back once release() was called and the
+    work started with it has finished, so work that keeps running after the
+    client went away still counts against the stage.
+    """
+
+    def __init__(self, stage):
+        self._stage = stage
+        self._admitted_at = time.perf_counter()
+        self._ran = False
+        self._running = 0
+        self._closed = False
+        self._released = False
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking function on the stage's threads and await its result.
+        If the caller is cancelled while the work is still queued, the work is
+        dropped; once it has started it finishes on its own.
+        """
+        with self._stage._lock:
+            self._ran = True
+            self._running += 1
+        try:
+            future = self._stage._pool.submit(self._call, functools.partial(func, *args, **kwargs), time.perf_counter())
+        except Exception:
+            self._finished(None)
+            raise
+        # Runs whether the work finished or was cancelled before it started
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    async def iterate(self, iterator):
+        """
+        Async-iterate a blocking iterator (e.g. a streaming completion),
+        advancing it one item at a time on the stage's threads.
+        """
+        done = object()
+        try:
+            while True:
+                item = await self.run(next, iterator, done)
+                if item is done:
+                    break
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                try:
+                    close()
+                except ValueError:
+                    pass  # Still running on a stage thread (client went away mid-step); it finishes on its own
+
+    def _call(self, func, submitted: float):
+        started = time.perf_counter()
+        STAGE_QUEUE_WAIT.labels(stage=self._stage.name).observe(started - submitted)
+        return func()
+
+    def _finished(self, future):
+        with self._stage._lock:
+            self._running -= 1
+        self._release_if_done()
+
+    def release(self):
+        """Give the slot back (as soon as work still running on it finishes)"""
+        with self._stage._lock:
+            self._closed = True
+        self._release_if_done()
+
+    def _release_if_done(self):
+        with self._stage._lock:
+            if not self._closed or self._running or self._released:
+                return
+            self._released = True
+            self._stage._admitted -= 1
+            admitted = self._stage._admitted
+        STAGE_ADMITTED.labels(stage=self._stage.name).set(admitted)
+        if self._ran:
+            self._stage._record(time.perf_counter() - self._admitted_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class Stage:
+    """A thread pool for one kind of blocking work that admits at most workers + queue_size requests"""
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.rejected = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self._admitted = 0
+        self._average_seconds = None
+        self._lock = threading.Lock()
+
+    def admit(self) -> Admission:
+        """Take a slot for one request; raises StageSaturated if the stage is full"""
+        self._make_room(take=True)
+        return Admission(self)
+
+    def check(self):
+        """Raise StageSaturated if admit() would refuse a request right now, without taking a slot"""
+        self._make_room(take=False)
+
+    def _make_room(self, take: bool):
+        with self._lock:
+            full = self._admitted >= self.workers + self.queue_size
+            if full:
+                self.rejected += 1
+                retry_after = self._retry_after()
+            elif take:
+                self._admitted += 1
+            admitted = self._admitted
+
+        if full:
+            STAGE_REJECTED.labels(stage=self.name).inc()
+            print(f"🚦 Refusing {self.name} work: {admitted} requests admitted, retry in {retry_after}s")
+            raise StageSaturated(
+                f"The server is busy right now. Please retry after {retry_after}s.", retry_after
+            )
+        STAGE_ADMITTED.labels(stage=self.name).set(admitted)
+
+    async def run(self, func, *args, **kwargs):
+        """Admit, then run a blocking function on the stage's threads and await its result"""
+        with self.admit() as admission:
+            return await admission.run(func, *args, **kwargs)
+
+    def _record(self, seconds: float):
+        with self._lock:
+            if self._average_seconds is None:
+                self._average_seconds = seconds
+            else:
+                self._average_seconds += DURATION_SMOOTHING * (seconds - self._average_seconds)
+
+    def _retry_after(self) -> int:
+        # Roughly how long the threads need to get through the work already waiting
+        average = self._average_seconds or DEFAULT_TASK_SECONDS
+        waiting = max(1, self._admitted - self.workers)
+        seconds = math.ceil(average * waiting / self.workers)
+        return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, seconds))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "admitted": self._admitted,
+                "rejected": self.rejected,
+                "average_seconds": round(self._average_seconds, 3) if self._average_seconds is not None else None,
+            }
+
+
+def admit_all(*stages) -> list:
+    """Admit to several stages at once; if one is full, none is held and StageSaturated is raised"""
+    admissions = []
+    try:
+        for stage in stages:
+            admissions.append(stage.admit())
+    except StageSaturated:
+        for admission in admissions:
+            admission.release()
+        raise
+    return admissions
+
+
+# Compaction, splitting and the Whisper calls of one transcription
+audio_stage = Stage("audio", AUDIO_WORKERS, AUDIO_QUEUE_SIZE)
+
+# yt-dlp downloads and YouTube caption fetches
+download_stage = Stage("download", DOWNLOAD_WORKERS, DOWNLOAD_QUEUE_SIZE)
+
+# Summary and quiz generation (blocking Groq chat completions)
+llm_stage = Stage("llm", LLM_WORKERS, LLM_QUEUE_SIZE)
+
+
+def stage_stats() -> dict:
+    return {stage.name: stage.stats() for stage in (audio_stage, download_stage, llm_stage)}
@@ -0,0 +1,83 @@
+"""
+Lazy Loading
+Heavy dependencies (groq, yt-dlp, youtube-transcript-api, requests and the
+static FFmpeg bootstrap) are loaded the first time they are needed instead
+of when the app is imported, so a cold start only pays for FastAPI itself.
+
+Every Lazy value is registered, and prewarm() loads them all; main.py runs
+it in a background thread once the server is accepting requests
+(STARTUP_PREWARM), so the first real request usually finds them ready.
+"""
+import time
+import importlib
+import threading
+
+from metrics import STARTUP_SECONDS
+
+_registry = []
+
+
+class Lazy:
+    """
+    Thread-safe value created by factory() on the first call; later calls
+    return the same object. A factory that raises is retried on the next call.
+    """
+
+    def __init__(self, name: str, factory):
+        self.name = name
+        self._factory = factory
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __call__(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self._factory()
+                    self._loaded = True
+        return self._value
+
+
+class LazyProxy:
+    """Stands in for a Lazy object, creating it on first attribute access"""
+
+    def __init__(self, lazy: Lazy):
+        self._lazy = lazy
+
+    def __getattr__(self, name):
+        return getattr(self._lazy(), name)
+
+
+def lazy_import(module_name: str) -> Lazy:
+    """Lazy module: call it to import the module (e.g. yt_dlp().YoutubeDL)"""
+    return Lazy(module_name, lambda: importlib.import_module(module_name))
+
+
+# Filled in by prewarm(): seconds spent loading each value, and the total
+prewarm_report = {}
+
+
+def prewarm():
+    """Load every registered lazy value now (meant to run in a background thread)"""
+    started = time.perf_counter()
+    for lazy in list(_registry):
+        if lazy.loaded:
+            continue
+        item_started = time.perf_counter()
+        try:
+            lazy()
+        except Exception as e:
+            print(f"⚠️  Prewarm of {lazy.name} failed: {e}")
+            continue
+        prewarm_report[lazy.name] = round(time.perf_counter() - item_started, 3)
+
+    elapsed = time.perf_counter() - started
+    prewarm_report["total"] = round(elapsed, 3)
+    STARTUP_SECONDS.labels(phase="prewarm").set(elapsed)
+    print(f"🔥 Prewarmed {', '.join(name for name in prewarm_report if name != 'total')} in {elapsed:.2f}s")
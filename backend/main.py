@@ -2,22 +2,47 @@
 Lecture Voice-to-Notes Generator API
 A FastAPI application for transcribing audio lectures and generating study materials.
 """
-import static_ffmpeg
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from config import CORS_ORIGINS
+from config import CORS_ORIGINS, STARTUP_PREWARM
 from routes.transcription_routes import router as transcription_router
 from routes.processing_routes import router as processing_router
+from routes.job_routes import router as job_router
+from routes.batch_routes import router as batch_router
+from routes.lecture_routes import router as lecture_router
+from services.transcript_cache import transcript_cache
+from services.result_cache import result_cache
+from services.workspace_service import workspace_manager
+from executors import stage_stats
+from metrics import render_metrics, STARTUP_SECONDS
+from lazy import prewarm, prewarm_report
+
+# FFmpeg paths, groq, yt-dlp and youtube-transcript-api are loaded on first use (see lazy.py)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Report startup time, start the workspace reaper, then load lazy dependencies in the background if enabled"""
+    print(f"🚀 Imported app in {import_seconds * 1000:.0f} ms")
+    # Delete temp workspaces left behind by crashed workers, now and periodically
+    workspace_manager.start_reaper()
+    if STARTUP_PREWARM:
+        threading.Thread(target=prewarm, name="prewarm", daemon=True).start()
+    yield
 
-# Initialize FFmpeg paths
-static_ffmpeg.add_paths()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Lecture Voice-to-Notes API",
     description="AI-powered lecture transcription and note generation using Groq",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS - Allow all origins for public deployment
@@ -33,6 +58,13 @@ app.add_middleware(
 # Include routers
 app.include_router(transcription_router)
 app.include_router(processing_router)
+app.include_router(job_router)
+app.include_router(batch_router)
+app.include_router(lecture_router)
+
+# Import cost of the app (a regression metric; see benchmarks/startup_time.py)
+import_seconds = time.perf_counter() - _import_started
+STARTUP_SECONDS.labels(phase="import").set(import_seconds)
 
 
 @app.get("/")
@@ -48,4 +80,18 @@ def read_root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "transcript_cache": transcript_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "workspaces": workspace_manager.stats(),
+        "stages": stage_stats(),
+        "startup": {"import_seconds": round(import_seconds, 3), "prewarm_seconds": prewarm_report},
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: stage latencies, retries, audio seconds and LLM tokens"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,96 @@
+"""
+Metrics
+Prometheus metrics for the processing pipeline, served on /metrics.
+Stage latencies show which step dominates under load; token and audio
+counters show how much of the Groq quota each model uses.
+"""
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+# Latency buckets from 50ms (cache hits, small chunks) to 30 minutes (long downloads/transcripts)
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+
+# Stages: upload_ingest, ytdlp_download, caption_fetch, ffmpeg_compact, ffmpeg_segment,
+# whisper_chunk, summarize_llm, quiz_llm
+STAGE_DURATION = Histogram(
+    "lecture_stage_duration_seconds",
+    "Time spent in each processing stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+GROQ_CALL_ATTEMPTS = Histogram(
+    "groq_call_attempts",
+    "Attempts needed per Groq API call (1 = no retry)",
+    ["model"],
+    buckets=(1, 2, 3, 4, 5, 8),
+)
+
+GROQ_RETRIES = Counter(
+    "groq_retries_total",
+    "Groq API calls retried after a rate limit or server error",
+    ["model"],
+)
+
+AUDIO_SECONDS = Counter(
+    "whisper_audio_seconds_total",
+    "Seconds of audio transcribed by Whisper",
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens used by chat completions",
+    ["model", "type"],  # type: prompt | completion
+)
+
+# Stages: audio, download, llm (see executors.py)
+STAGE_ADMITTED = Gauge(
+    "stage_admitted_requests",
+    "Requests admitted to a stage executor (running or waiting for a thread)",
+    ["stage"],
+)
+
+STAGE_REJECTED = Counter(
+    "stage_rejected_total",
+    "Requests refused with 503 because a stage executor was saturated",
+    ["stage"],
+)
+
+STAGE_QUEUE_WAIT = Histogram(
+    "stage_queue_wait_seconds",
+    "Time admitted work waited for a stage executor thread",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+# Phases: import (loading main.py and the routers), prewarm (background loading of lazy dependencies)
+STARTUP_SECONDS = Gauge(
+    "startup_seconds",
+    "Time spent in each startup phase of this process",
+    ["phase"],
+)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Record how long the wrapped block takes as a stage latency"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def record_llm_usage(model: str, completion):
+    """Count prompt/completion tokens from a chat completion response"""
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(model=model, type="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(model=model, type="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def render_metrics() -> tuple:
+    """Return (body, content type) in the Prometheus text format"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,12 +1,19 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 class TranscriptRequest(BaseModel):
     transcript: str
+    refresh: bool = False  # Regenerate instead of returning a cached result
 
 class QuizRequest(BaseModel):
     notes: Optional[str] = None
     transcript: Optional[str] = None 
+    refresh: bool = False  # Regenerate instead of returning a cached result
 
 class YouTubeRequest(BaseModel):
     url: str
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+    summarize: bool = True
+    quiz: bool = True
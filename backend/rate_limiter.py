@@ -0,0 +1,192 @@
+"""
+Rate Limiter
+Process-wide scheduler for Groq API calls. Every Whisper, summary and quiz
+request goes through it, so the whole process shares one view of the quota
+instead of each thread retrying on its own.
+
+- Token buckets per model for requests/minute and tokens/minute keep the
+  send rate just under the quota (RATE_LIMIT_HEADROOM).
+- Callers waiting on the same model are served first-come, first-served.
+- On 429/5xx the model is paused for everyone, using the server's
+  retry-after header when present, plus jitter so waiters don't wake together.
+"""
+import time
+import random
+import threading
+from collections import deque, defaultdict
+
+from config import GROQ_RATE_LIMITS, RATE_LIMIT_HEADROOM, GROQ_MAX_ATTEMPTS
+from metrics import GROQ_CALL_ATTEMPTS, GROQ_RETRIES
+
+# Seconds of quota a bucket may accumulate while idle (limits bursts)
+BURST_SECONDS = 10
+# Backoff when the server gives no retry-after: BASE * 2^attempt seconds
+BACKOFF_BASE_SECONDS = 2
+# Random extra delay added to every pause, as a fraction of the pause
+JITTER_FRACTION = 0.25
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Refills at `per_minute * headroom` units per minute; may go into debt for large requests"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute * RATE_LIMIT_HEADROOM / 60.0
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (requests bigger than the bucket wait for a full bucket)"""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return max(0.0, (needed - self.level) / self.rate)
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+
+class _ModelState:
+    def __init__(self, limits: dict):
+        self.requests = TokenBucket(limits["rpm"]) if limits.get("rpm") else None
+        self.tokens = TokenBucket(limits["tpm"]) if limits.get("tpm") else None
+        self.paused_until = 0.0
+        self.waiters = deque()
+        self.stats = defaultdict(float)
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        wait = self.paused_until - now
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(0.0, wait)
+
+    def take(self, tokens: int, now: float):
+        if self.requests:
+            self.requests.take(1, now)
+        if self.tokens and tokens:
+            self.tokens.take(tokens, now)
+
+
+def _status_code(error: Exception):
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and connection problems are worth retrying"""
+    if _status_code(error) in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error: Exception):
+    """Read the retry-after header (seconds) from an API error, if present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form, fall back to backoff
+
+
+class RateLimitScheduler:
+    """Shared gate for all outbound Groq requests"""
+
+    def __init__(self, limits: dict, max_attempts: int = GROQ_MAX_ATTEMPTS):
+        self.limits = limits
+        self.max_attempts = max_attempts
+        self._models = {}
+        self._cond = threading.Condition()
+
+    def _state(self, model: str) -> _ModelState:
+        if model not in self._models:
+            self._models[model] = _ModelState(self.limits.get(model, {}))
+        return self._models[model]
+
+    def acquire(self, model: str, tokens: int = 0):
+        """Block until this caller is first in line for the model and the quota allows the request"""
+        ticket = object()
+        with self._cond:
+            state = self._state(model)
+            state.waiters.append(ticket)
+            started = time.monotonic()
+            try:
+                while True:
+                    now = time.monotonic()
+                    if state.waiters[0] is ticket:
+                        wait = state.wait_time(tokens, now)
+                        if wait <= 0:
+                            state.take(tokens, now)
+                            state.stats["requests"] += 1
+                            state.stats["wait_seconds"] += now - started
+                            return
+                    else:
+                        wait = None  # Not our turn yet; woken when the queue moves
+                    self._cond.wait(timeout=wait)
+            finally:
+                state.waiters.remove(ticket)
+                self._cond.notify_all()
+
+    def pause(self, model: str, seconds: float):
+        """Stop sending requests for a model for `seconds` (applies to every caller)"""
+        with self._cond:
+            state = self._state(model)
+            state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def call(self, model: str, func, tokens: int = 0):
+        """
+        Run func() once the model's quota allows it, retrying rate limit and
+        server errors. tokens is the estimated prompt + completion size.
+        """
+        for attempt in range(self.max_attempts):
+            self.acquire(model, tokens)
+            try:
+                result = func()
+                GROQ_CALL_ATTEMPTS.labels(model=model).observe(attempt + 1)
+                return result
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_attempts - 1:
+                    GROQ_CALL_ATTEMPTS.labels(model=model).observe(attempt + 1)
+                    raise
+
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = BACKOFF_BASE_SECONDS * (2 ** attempt)
+                delay += random.uniform(0, delay * JITTER_FRACTION)
+
+                with self._cond:
+                    self._state(model).stats["retries"] += 1
+                GROQ_RETRIES.labels(model=model).inc()
+                print(f"API error on {model} (attempt {attempt + 1}/{self.max_attempts}): "
+                      f"{type(e).__name__} [{_status_code(e)}]. Pausing {model} for {delay:.1f}s...")
+                self.pause(model, delay)
+
+    def stats(self) -> dict:
+        """Per-model request, retry and queueing counters"""
+        with self._cond:
+            return {
+                model: {
+                    "requests": int(state.stats["requests"]),
+                    "retries": int(state.stats["retries"]),
+                    "wait_seconds": round(state.stats["wait_seconds"], 3),
+                    "queued": len(state.waiters),
+                }
+                for model, state in self._models.items()
+            }
+
+
+scheduler = RateLimitScheduler(GROQ_RATE_LIMITS)
@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from models import BatchRequest
+from config import get_groq_client, BATCH_MAX_ITEMS
+from services.upload_service import ingest_uploads, UploadError, MULTI_UPLOAD_OPENAPI
+from services.batch_service import batch_manager
+from services.job_service import JobQueueFull
+from services.workspace_service import workspace_manager, WorkspaceError
+from routes.job_routes import event_stream_response
+
+router = APIRouter(prefix="/api/batches", tags=["batches"])
+
+client = get_groq_client()
+
+
+def _create_workspaces(count: int) -> list:
+    """One workspace per batch item; none are kept if any cannot be created"""
+    workspaces = []
+    try:
+        for _ in range(count):
+            workspaces.append(workspace_manager.create("batch"))
+    except Exception:
+        for workspace in workspaces:
+            workspace.release()
+        raise
+    return workspaces
+
+
+def _submit(sources: list, summarize: bool, quiz: bool):
+    """Submit a batch and build the 202 response with its polling URLs"""
+    try:
+        batch = batch_manager.submit(sources, client, summarize, quiz)
+    except JobQueueFull as e:
+        for source in sources:
+            source["workspace"].release()
+        return JSONResponse(status_code=503, content={"error": str(e)})
+
+    return JSONResponse(status_code=202, content={
+        "batch_id": batch.id,
+        "status": batch.status,
+        "items": [{"index": item.index, "name": item.name} for item in batch.items],
+        "status_url": f"/api/batches/{batch.id}",
+        "events_url": f"/api/batches/{batch.id}/events",
+    })
+
+
+@router.post("")
+async def submit_link_batch(request: BatchRequest):
+    """Transcribe, summarize and quiz a list of links (YouTube captions or downloadable audio)"""
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    urls = [url.strip() for url in request.urls if url.strip()]
+    if not urls:
+        return JSONResponse(status_code=400, content={"error": "No URLs provided"})
+    if len(urls) > BATCH_MAX_ITEMS:
+        return JSONResponse(status_code=400, content={"error": f"Too many URLs. A batch can hold at most {BATCH_MAX_ITEMS}."})
+
+    try:
+        workspaces = _create_workspaces(len(urls))
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    sources = [{"type": "url", "url": url, "workspace": workspace} for url, workspace in zip(urls, workspaces)]
+    return _submit(sources, request.summarize, request.quiz)
+
+
+@router.post("/upload", openapi_extra=MULTI_UPLOAD_OPENAPI)
+async def submit_upload_batch(request: Request, summarize: bool = True, quiz: bool = True):
+    """Transcribe, summarize and quiz several uploaded audio files (multipart 'files' field)"""
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    # Files arrive in one request, so they land in a shared workspace and then move to one per item
+    try:
+        staging = workspace_manager.create("batch_upload")
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    try:
+        uploads = await ingest_uploads(
+            request, field_name="files", dest_dir=staging.directory,
+            max_files=BATCH_MAX_ITEMS, max_total_bytes=staging.remaining_bytes()
+        )
+        print(f"📁 Received {len(uploads)} files for batch processing")
+
+        workspaces = _create_workspaces(len(uploads))
+        try:
+            sources = [
+                dict(upload, type="upload", path=workspace.adopt(upload["path"]), workspace=workspace)
+                for upload, workspace in zip(uploads, workspaces)
+            ]
+        except Exception:
+            for workspace in workspaces:
+                workspace.release()
+            raise
+    except (UploadError, WorkspaceError) as e:
+        print(f"❌ Batch upload rejected: {e}")
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+    finally:
+        staging.release()
+
+    return _submit(sources, summarize, quiz)
+
+
+@router.get("/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Return the status and, once finished, the result of every item in a batch"""
+    batch = batch_manager.get(batch_id)
+    if not batch:
+        return JSONResponse(status_code=404, content={"error": "Batch not found"})
+    return batch.to_dict()
+
+
+@router.get("/{batch_id}/events")
+async def stream_batch_events(batch_id: str, request: Request):
+    """
+    Stream batch events as Server-Sent Events: 'item_stage' as lectures move
+    through the pipeline, 'item_done' with each lecture's result as soon as it
+    finishes, and a final 'done' event.
+    """
+    batch = batch_manager.get(batch_id)
+    if not batch:
+        return JSONResponse(status_code=404, content={"error": "Batch not found"})
+    return event_stream_response(batch, request)
@@ -0,0 +1,236 @@
+import json
+import asyncio
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from models import YouTubeRequest
+from config import get_groq_client
+from services.audio_service import process_audio_file
+from services.upload_service import ingest_upload, UploadError, UPLOAD_OPENAPI
+from services.job_service import job_manager, JobQueueFull, JobRunning
+from services.checkpoint_service import checkpoint_store
+from services.workspace_service import workspace_manager, WorkspaceError
+from services.youtube_service import download_audio_from_url, download_audio_from_generic_link
+from services.youtube_transcript_service import get_youtube_transcript, is_youtube_url
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+client = get_groq_client()
+
+# How often the SSE stream checks a job for new events (seconds)
+EVENT_POLL_INTERVAL = 0.5
+
+
+def _run_checkpoint(job, workspace, checkpoint) -> dict:
+    """
+    Transcribe the audio kept in a checkpoint. Chunks that already have a
+    result are skipped. The checkpoint is deleted once every chunk is
+    transcribed; otherwise it is kept so the job can be resumed.
+    The job's workspace (compacted audio) is released when it finishes.
+    The checkpoint outlives the workspace but counts against its quota.
+    """
+    workspace.include(checkpoint.directory)
+    try:
+        with workspace:
+            result = process_audio_file(
+                checkpoint.source_path, client, digest=checkpoint.digest, progress=job, checkpoint=checkpoint,
+                workspace=workspace
+            )
+    finally:
+        # Once split, the chunks are all a resume needs
+        if checkpoint.segmented and checkpoint.source_path:
+            checkpoint.discard_source()
+
+    if result["failed_chunks"]:
+        return dict(result, resume_url=f"/api/jobs/{job.id}/resume")
+    checkpoint_store.delete(checkpoint)
+    return result
+
+
+def _run_with_checkpoint(job, workspace, audio_path: str, digest: str = None) -> dict:
+    """Move downloaded/uploaded audio into a new checkpoint for the job and transcribe it"""
+    with workspace:
+        workspace.check_quota()
+        # Checkpoints live outside the workspace root, maybe on another disk
+        workspace_manager.check_free_space(checkpoint_store.root)
+        checkpoint = checkpoint_store.create(job.id, job.kind, digest)
+        checkpoint.keep_source(audio_path)
+        return _run_checkpoint(job, workspace, checkpoint)
+
+
+def _run_upload_job(job, workspace, temp_filename: str, digest: str) -> dict:
+    """Transcribe an uploaded file that was already saved to the job's workspace"""
+    return _run_with_checkpoint(job, workspace, temp_filename, digest)
+
+
+def _run_youtube_job(job, workspace, url: str) -> dict:
+    """Download audio with yt-dlp and transcribe it"""
+    with workspace:
+        job.set_stage("downloading")
+        temp_filename = download_audio_from_url(
+            url, preferred_codec='m4a', output_dir=workspace.directory, max_bytes=workspace.remaining_bytes()
+        )
+        return _run_with_checkpoint(job, workspace, temp_filename)
+
+
+def _run_link_job(job, workspace, url: str) -> dict:
+    """Use YouTube captions when available, otherwise download and transcribe"""
+    with workspace:
+        if is_youtube_url(url):
+            job.set_stage("fetching_captions")
+            return {"transcript": get_youtube_transcript(url), "failed_chunks": []}
+
+        job.set_stage("downloading")
+        final_filename = download_audio_from_generic_link(url, workspace.directory, workspace.remaining_bytes())
+        return _run_with_checkpoint(job, workspace, final_filename)
+
+
+def _submit(kind: str, func, workspace, *args, job_id: str = None):
+    """
+    Submit a job that owns the given workspace and build the 202 response
+    with its polling URLs. The workspace is released if the job is refused.
+    """
+    try:
+        job = job_manager.submit(kind, func, workspace, *args, job_id=job_id)
+    except JobQueueFull as e:
+        workspace.release()
+        return JSONResponse(status_code=503, content={"error": str(e)})
+    except JobRunning as e:
+        workspace.release()
+        return JSONResponse(status_code=409, content={"error": str(e)})
+
+    return JSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events",
+    })
+
+
+@router.post("/transcribe", openapi_extra=UPLOAD_OPENAPI)
+async def submit_transcribe_job(request: Request):
+    """Start transcribing an uploaded audio file in the background"""
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    try:
+        workspace = workspace_manager.create("job")
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    try:
+        upload = await ingest_upload(request, dest_dir=workspace.directory, max_bytes=workspace.remaining_bytes())
+    except UploadError as e:
+        workspace.release()
+        print(f"❌ Upload rejected: {e}")
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+    except Exception:
+        workspace.release()
+        raise
+    print(f"📁 Received file for background job: {upload['filename']}")
+
+    return _submit("transcribe", _run_upload_job, workspace, upload["path"], upload["digest"])
+
+
+@router.post("/youtube-transcribe")
+async def submit_youtube_job(request: YouTubeRequest):
+    """Start downloading and transcribing a YouTube URL in the background"""
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    try:
+        workspace = workspace_manager.create("job")
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    return _submit("youtube-transcribe", _run_youtube_job, workspace, request.url)
+
+
+@router.post("/fetch-audio")
+async def submit_link_job(request: YouTubeRequest):
+    """Start transcribing a generic link in the background"""
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    try:
+        workspace = workspace_manager.create("job")
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    return _submit("fetch-audio", _run_link_job, workspace, request.url)
+
+
+@router.post("/{job_id}/resume")
+async def resume_job(job_id: str):
+    """
+    Retry a job that failed or finished with failed chunks. Chunks that were
+    already transcribed (kept on disk, so this works after a restart) are not
+    sent again; nothing is downloaded or split again once the audio was split.
+    """
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    checkpoint = checkpoint_store.load(job_id)
+    if not checkpoint or not (checkpoint.segmented or checkpoint.source_path):
+        return JSONResponse(status_code=404, content={"error": "Nothing to resume for this job"})
+
+    try:
+        workspace_manager.check_free_space(checkpoint_store.root)
+        workspace = workspace_manager.create("job")
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    print(f"🔁 Resuming {checkpoint.kind} job {job_id}")
+    return _submit(checkpoint.kind, _run_checkpoint, workspace, checkpoint, job_id=job_id)
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """Return the current stage, chunk progress and result of a job"""
+    job = job_manager.get(job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return job.to_dict()
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Stream job events as Server-Sent Events.
+    Partial transcript text is sent as 'chunk' events as soon as each chunk
+    finishes; the stream ends with a 'done' event. Reconnecting clients can
+    send Last-Event-ID to resume where they left off.
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+
+    return event_stream_response(job, request)
+
+
+def event_stream_response(source, request: Request) -> StreamingResponse:
+    """
+    Serve the event log of a job or batch (anything with events_since() and
+    finished) as Server-Sent Events, resuming after Last-Event-ID if sent.
+    """
+    try:
+        last_id = int(request.headers.get("last-event-id", -1))
+    except ValueError:
+        last_id = -1
+
+    async def event_stream():
+        nonlocal last_id
+        while True:
+            finished = source.finished  # Read before draining so the final events are never missed
+            for event in source.events_since(last_id):
+                last_id = event["id"]
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            if finished or await request.is_disconnected():
+                break
+            await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,92 @@
+import json
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from models import YouTubeRequest
+from config import get_groq_client
+from services.upload_service import ingest_upload, UploadError, UPLOAD_OPENAPI
+from services.lecture_service import lecture_artifacts
+from services.workspace_service import workspace_manager, WorkspaceError
+from executors import audio_stage, download_stage, StageSaturated, saturated_response
+
+router = APIRouter(prefix="/api/lecture", tags=["lecture"])
+
+client = get_groq_client()
+
+
+def _stream_lecture(source: dict, summarize: bool, quiz: bool) -> StreamingResponse:
+    """
+    Serve the lecture artifacts as Server-Sent Events: 'transcript', then
+    'summary' and 'quiz' as each finishes ('error' for a failed step), then 'done'.
+    Once the stream starts, the transcription step releases the source's
+    workspace; if the response never gets that far, it is released afterwards.
+    """
+    started = False
+
+    async def event_stream():
+        nonlocal started
+        started = True
+        async for artifact, data in lecture_artifacts(source, client, summarize, quiz):
+            yield f"event: {artifact}\ndata: {json.dumps(data)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    def release_unstarted():
+        if not started:
+            source["workspace"].release()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release_unstarted),
+    )
+
+
+@router.post("", openapi_extra=UPLOAD_OPENAPI)
+async def process_lecture_upload(request: Request, summarize: bool = True, quiz: bool = True):
+    """Transcribe an uploaded lecture, then stream the summary and quiz as they are generated"""
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    try:
+        # Transcription takes its slot once the stream starts; refuse now if there is none left
+        audio_stage.check()
+        workspace = workspace_manager.create("lecture")
+    except StageSaturated as e:
+        return saturated_response(e)
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    try:
+        upload = await ingest_upload(request, dest_dir=workspace.directory, max_bytes=workspace.remaining_bytes())
+    except UploadError as e:
+        workspace.release()
+        print(f"❌ Upload rejected: {e}")
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+    except Exception:
+        workspace.release()
+        raise
+    print(f"📁 Received lecture: {upload['filename']} ({upload['format']}, {upload['size'] / 1024 / 1024:.2f} MB)")
+
+    return _stream_lecture(dict(upload, type="upload", workspace=workspace), summarize, quiz)
+
+
+@router.post("/link")
+async def process_lecture_link(request: YouTubeRequest, summarize: bool = True, quiz: bool = True):
+    """Transcribe a lecture link (YouTube captions or downloadable audio), then stream the summary and quiz"""
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    try:
+        # Download and transcription take their slots once the stream starts; refuse now if there are none left
+        download_stage.check()
+        audio_stage.check()
+        workspace = workspace_manager.create("lecture")
+    except StageSaturated as e:
+        return saturated_response(e)
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    print(f"🔗 Processing lecture link: {request.url}")
+    return _stream_lecture({"type": "url", "url": request.url, "workspace": workspace}, summarize, quiz)
@@ -1,9 +1,11 @@
+import json
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from models import TranscriptRequest, QuizRequest
 from config import get_groq_client
-from services.summarization_service import generate_summary
+from executors import llm_stage, StageSaturated, saturated_response
+from services.summarization_service import generate_summary, stream_summary
 from services.quiz_service import generate_quiz_and_flashcards
 
 router = APIRouter(prefix="/api", tags=["processing"])
@@ -18,9 +20,11 @@ async def summarize_transcript(request: TranscriptRequest):
         return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
     
     try:
-        summary = generate_summary(client, request.transcript)
+        summary = await llm_stage.run(generate_summary, client, request.transcript, request.refresh)
         return {"summary": summary}
 
+    except StageSaturated as e:
+        return saturated_response(e)
     except Exception as e:
         print(f"❌ Summarize Error: {type(e).__name__}: {e}")
         import traceback
@@ -28,20 +32,55 @@ async def summarize_transcript(request: TranscriptRequest):
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@router.post("/summarize/stream")
+async def summarize_transcript_stream(request: TranscriptRequest):
+    """
+    Generate a summary and stream it as Server-Sent Events: 'delta' events
+    carry formatted text as soon as each line is written, then 'done' (or 'error').
+    """
+    if not client:
+        return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
+
+    # The slot is only taken once the stream starts, so refuse up front if there is none left now
+    try:
+        llm_stage.check()
+    except StageSaturated as e:
+        return saturated_response(e)
+
+    async def event_stream():
+        try:
+            pieces = stream_summary(client, request.transcript, request.refresh)
+            with llm_stage.admit() as admission:
+                async for text in admission.iterate(pieces):
+                    yield f"event: delta\ndata: {json.dumps({'text': text})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            print(f"❌ Summarize Stream Error: {type(e).__name__}: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/quiz")
 async def generate_quiz(request: QuizRequest):
     """Generate quiz questions and flashcards from notes or transcript"""
     if not client:
         return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
     
-    content_text = request.notes or request.transcript
+    content_text = next((text for text in (request.notes, request.transcript) if text and text.strip()), None)
     if not content_text:
         return JSONResponse(status_code=400, content={"error": "No text provided"})
 
     try:
-        result = generate_quiz_and_flashcards(client, content_text)
+        result = await llm_stage.run(generate_quiz_and_flashcards, client, content_text, request.refresh)
         return result
 
+    except StageSaturated as e:
+        return saturated_response(e)
     except Exception as e:
         print(f"❌ Quiz Error: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
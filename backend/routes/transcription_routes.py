@@ -1,55 +1,64 @@
-import os
-import uuid
-import shutil
-import asyncio
-import tempfile
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 
 from models import YouTubeRequest
 from config import get_groq_client
 from services.audio_service import process_audio_file
+from services.upload_service import ingest_upload, UploadError, UPLOAD_OPENAPI
 from services.youtube_service import download_audio_from_url, download_audio_from_generic_link
 from services.youtube_transcript_service import get_youtube_transcript, is_youtube_url
+from services.workspace_service import workspace_manager, WorkspaceError
+from executors import audio_stage, download_stage, admit_all, StageSaturated, saturated_response
 
 router = APIRouter(prefix="/api", tags=["transcription"])
 
 client = get_groq_client()
 
 
-@router.post("/transcribe")
-async def transcribe_audio(file: UploadFile = File(...)):
-    """Transcribe an uploaded audio file"""
+@router.post("/transcribe", openapi_extra=UPLOAD_OPENAPI)
+async def transcribe_audio(request: Request):
+    """Transcribe an uploaded audio file (multipart/form-data with a 'file' field)"""
     if not client:
         return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
-    
+
     try:
-        print(f"📁 Received file: {file.filename}")
-        
-        # Save upload to temp file (use system temp dir for cross-platform compatibility)
-        file_ext = os.path.splitext(file.filename)[1] or ".mp3"
-        temp_filename = os.path.join(tempfile.gettempdir(), f"upload_{uuid.uuid4()}{file_ext}")
-        
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
+        workspace = workspace_manager.create("transcribe")
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    admission = None
+    try:
+        # Take a transcription slot before receiving the upload, so a busy server refuses it right away
+        admission = audio_stage.admit()
+
+        # Stream the upload to a single file in the workspace, hashing and size-checking as it arrives
+        upload = await ingest_upload(request, dest_dir=workspace.directory, max_bytes=workspace.remaining_bytes())
+        temp_filename = upload["path"]
+        print(f"📁 Received file: {upload['filename']} ({upload['format']}, {upload['size'] / 1024 / 1024:.2f} MB)")
         print(f"💾 Saved to {temp_filename}")
-        
-        try:
-            # Process the file (handles chunking if needed)
-            transcript_text = await asyncio.to_thread(process_audio_file, temp_filename, client)
-            
-            print("✅ Transcription complete")
-            return {"transcript": transcript_text}
-        finally:
-            if os.path.exists(temp_filename):
-                os.remove(temp_filename)
 
+        # Process the file (handles chunking if needed, served from cache on repeat uploads)
+        result = await admission.run(
+            process_audio_file, temp_filename, client, digest=upload["digest"], workspace=workspace
+        )
+
+        print("✅ Transcription complete")
+        return result
+
+    except StageSaturated as e:
+        return saturated_response(e)
+    except (UploadError, WorkspaceError) as e:
+        print(f"❌ Upload rejected: {e}")
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
     except Exception as e:
         print(f"❌ Transcribe Error: {type(e).__name__}: {e}")
         import traceback
         traceback.print_exc()
         return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        if admission:
+            admission.release()
+        workspace.release()
 
 
 @router.post("/youtube-transcribe")
@@ -58,32 +67,48 @@ async def youtube_transcribe(request: YouTubeRequest):
     if not client:
         return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
 
-    temp_filename = None
     try:
+        workspace = workspace_manager.create("youtube")
+    except WorkspaceError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+
+    admissions = []
+    try:
+        admissions = download, audio = admit_all(download_stage, audio_stage)
         print(f"🎥 Processing YouTube URL: {request.url}")
         
         # Download audio from YouTube
-        temp_filename = download_audio_from_url(request.url, preferred_codec='m4a')
+        temp_filename = await download.run(
+            download_audio_from_url,
+            request.url, preferred_codec='m4a', output_dir=workspace.directory, max_bytes=workspace.remaining_bytes()
+        )
+        download.release()
+        workspace.check_quota()
 
         # Process audio file (handles chunking for large files)
         print("🎙️  Processing audio file (will chunk if >25MB)...")
-        transcript_text = await asyncio.to_thread(process_audio_file, temp_filename, client)
+        result = await audio.run(process_audio_file, temp_filename, client, workspace=workspace)
         
         print("✅ YouTube transcription complete")
-        print(f"📊 Transcript length: {len(transcript_text)} characters")
+        print(f"📊 Transcript length: {len(result['transcript'])} characters")
         
-        return {"transcript": transcript_text}
+        return result
 
+    except StageSaturated as e:
+        return saturated_response(e)
+    except WorkspaceError as e:
+        print(f"❌ YouTube Transcribe Error: {e}")
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
     except Exception as e:
         print(f"❌ YouTube Transcribe Error: {type(e).__name__}: {e}")
         import traceback
         traceback.print_exc()
         return JSONResponse(status_code=500, content={"error": f"Failed to extract audio from YouTube: {str(e)}"})
     finally:
-        # Cleanup temp file
-        if temp_filename and os.path.exists(temp_filename):
-            os.remove(temp_filename)
-            print(f"🧹 Cleaned up temp file: {temp_filename}")
+        for admission in admissions:
+            admission.release()
+        # Cleanup the downloaded audio and any chunks
+        workspace.release()
 
 
 @router.post("/fetch-audio")
@@ -92,7 +117,8 @@ async def fetch_audio(request: YouTubeRequest):
     if not client:
         return JSONResponse(status_code=500, content={"error": "GROQ_API_KEY not configured"})
 
-    final_filename = None
+    workspace = None
+    admissions = []
     try:
         print(f"🔗 Processing Link: {request.url}")
         
@@ -100,10 +126,13 @@ async def fetch_audio(request: YouTubeRequest):
         if is_youtube_url(request.url):
             print("📹 YouTube URL detected - extracting transcript from captions...")
             try:
-                transcript_text = get_youtube_transcript(request.url)
+                # Run in a thread so requests for the same video can wait on one shared fetch
+                transcript_text = await download_stage.run(get_youtube_transcript, request.url)
                 print("✅ Transcript extracted successfully from YouTube captions!")
                 print(f"📊 Transcript length: {len(transcript_text)} characters")
                 return {"transcript": transcript_text}
+            except StageSaturated as e:
+                return saturated_response(e)
             except Exception as transcript_error:
                 # Log the full error for debugging in Render logs
                 print(f"❌ YouTube transcript extraction failed: {type(transcript_error).__name__}: {transcript_error}")
@@ -121,18 +150,29 @@ async def fetch_audio(request: YouTubeRequest):
                 
                 return JSONResponse(status_code=500, content={"error": user_message})
         
-        # For non-YouTube links, download audio and transcribe
-        final_filename = download_audio_from_generic_link(request.url)
+        # For non-YouTube links, download audio into a workspace and transcribe
+        admissions = download, audio = admit_all(download_stage, audio_stage)
+        workspace = workspace_manager.create("link")
+        final_filename = await download.run(
+            download_audio_from_generic_link, request.url, workspace.directory, workspace.remaining_bytes()
+        )
+        download.release()
+        workspace.check_quota()
 
         # Process audio file (handles chunking for large files)
         print("🎙️  Processing audio file (will chunk if >25MB)...")
-        transcript_text = await asyncio.to_thread(process_audio_file, final_filename, client)
+        result = await audio.run(process_audio_file, final_filename, client, workspace=workspace)
         
         print("✅ Link transcription complete")
-        print(f"📊 Transcript length: {len(transcript_text if transcript_text else '')} characters")
+        print(f"📊 Transcript length: {len(result['transcript'] or '')} characters")
         
-        return {"transcript": transcript_text}
+        return result
 
+    except StageSaturated as e:
+        return saturated_response(e)
+    except WorkspaceError as e:
+        print(f"❌ Fetch Audio Error: {e}")
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
     except Exception as e:
         print(f"❌ Fetch Audio Error: {type(e).__name__}: {e}")
         import traceback
@@ -151,10 +191,8 @@ async def fetch_audio(request: YouTubeRequest):
         
         return JSONResponse(status_code=500, content={"error": user_message})
     finally:
-        # Cleanup temp file
-        if final_filename and os.path.exists(final_filename):
-            try:
-                os.remove(final_filename)
-                print(f"🧹 Cleaned up temp file: {final_filename}")
-            except Exception as e:
-                print(f"⚠️  Failed to delete temp file: {e}")
+        for admission in admissions:
+            admission.release()
+        # Cleanup the downloaded audio and any chunks
+        if workspace:
+            workspace.release()
@@ -1,83 +1,610 @@
 import os
+import re
+import math
+import time
 import uuid
 import subprocess
 import shutil
 import tempfile
-from utils import retry_with_backoff
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def process_audio_file(file_path: str, client):
+from config import (
+    TRANSCRIBE_WORKERS,
+    AUDIO_COMPACTION,
+    AUDIO_COMPACTION_BITRATE,
+    AUDIO_COMPACTION_MIN_MB,
+    SEGMENT_FILL_RATIO,
+    SEGMENT_SILENCE_SEARCH_SECONDS,
+)
+from utils import hash_file, ensure_ffmpeg
+from rate_limiter import scheduler
+from metrics import track_stage, STAGE_DURATION, AUDIO_SECONDS
+from services.transcript_cache import transcript_cache
+
+WHISPER_MODEL = "whisper-large-v3"
+
+# Largest file the Whisper API accepts
+WHISPER_LIMIT_BYTES = 25 * 1024 * 1024  # 25MB
+
+# Segment length used when ffprobe cannot tell how long the audio is
+FALLBACK_SEGMENT_SECONDS = 600
+
+# What counts as a silence worth cutting in
+SILENCE_NOISE = "-35dB"
+SILENCE_MIN_SECONDS = 0.3
+_SILENCE_PATTERN = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+# How often to check the chunk directory for newly finished FFmpeg segments
+SEGMENT_POLL_INTERVAL = 0.2
+
+# Output container and encoder arguments for each compaction format
+COMPACTION_FORMATS = {
+    "opus": {"ext": ".ogg", "codec": ["-c:a", "libopus", "-application", "voip"]},
+    "mp3": {"ext": ".mp3", "codec": ["-c:a", "libmp3lame"]},
+}
+
+# Chunk extension for each container ffprobe reports (format_name) that
+# Whisper accepts and the audio can be copied into as is
+SEGMENT_CONTAINERS = {
+    "mp3": ".mp3",
+    "ogg": ".ogg",
+    "flac": ".flac",
+    "wav": ".wav",
+    "mov,mp4,m4a,3gp,3g2,mj2": ".m4a",
+    "matroska,webm": ".webm",
+}
+# Matroska audio can only be copied into WebM with one of these codecs
+WEBM_CODECS = {"opus", "vorbis"}
+
+
+def probe_audio(file_path: str) -> dict:
+    """
+    Return the duration (seconds), bit_rate (bits/s), format (container) and
+    codec (of the first audio stream) of an audio file using ffprobe; unknown values are None
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "format=duration,bit_rate,format_name:stream=codec_name",
+        "-of", "default=noprint_wrappers=1",
+        file_path
+    ]
+    info = {"duration": None, "bit_rate": None, "format": None, "codec": None}
+    try:
+        # The FFmpeg bootstrap can fail in many ways (e.g. a failed download); callers only lose the probe
+        ensure_ffmpeg()
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    except Exception:
+        return info
+    for line in output.splitlines():
+        key, _, value = line.partition("=")
+        if key == "format_name":
+            info["format"] = value or None
+        elif key == "codec_name":
+            info["codec"] = value or None
+        elif key in ("duration", "bit_rate"):
+            try:
+                info[key] = float(value) or None
+            except ValueError:
+                pass  # "N/A"
+    return info
+
+
+def probe_duration(file_path: str):
+    """Return the duration of an audio file in seconds using ffprobe, or None"""
+    return probe_audio(file_path)["duration"]
+
+
+def compact_audio(file_path: str, output_dir: str = None, audio_format: str = None, bitrate: str = None) -> str:
+    """
+    Re-encode audio to 16 kHz mono at a speech bitrate (Whisper resamples to
+    16 kHz mono anyway, so no accuracy is lost). This usually shrinks a
+    lecture by an order of magnitude, so it fits in fewer 25MB requests.
+    Returns the path to the compacted file.
+    """
+    audio_format = audio_format or AUDIO_COMPACTION
+    settings = COMPACTION_FORMATS[audio_format]
+    output_dir = output_dir or tempfile.gettempdir()
+    output_path = os.path.join(output_dir, f"compact_{uuid.uuid4()}{settings['ext']}")
+
+    cmd = [
+        "ffmpeg", "-y", "-i", file_path,
+        "-vn",  # Drop video/cover art streams
+        "-ac", "1",
+        "-ar", "16000",
+        *settings["codec"],
+        "-b:a", bitrate or AUDIO_COMPACTION_BITRATE,
+        output_path
+    ]
+    try:
+        ensure_ffmpeg()
+        with track_stage("ffmpeg_compact"):
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except Exception:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    return output_path
+
+
+def find_silence(file_path: str, start: float, end: float):
+    """Return the middle of the last silence between start and end (seconds), or None"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", file_path,
+        "-vn", "-af", f"silencedetect=noise={SILENCE_NOISE}:d={SILENCE_MIN_SECONDS}",
+        "-f", "null", "-"
+    ]
+    try:
+        stderr = subprocess.run(cmd, check=True, capture_output=True, text=True).stderr
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+    # Times are relative to the seek position; a silence still running at the end has no silence_end
+    silences = []
+    silence_start = None
+    for kind, value in _SILENCE_PATTERN.findall(stderr):
+        if kind == "start":
+            silence_start = start + float(value)
+        elif silence_start is not None:
+            silences.append((silence_start, start + float(value)))
+            silence_start = None
+    if silence_start is not None:
+        silences.append((silence_start, end))
+    if not silences:
+        return None
+    silence_start, silence_end = silences[-1]
+    return (max(silence_start, start) + min(silence_end, end)) / 2
+
+
+def plan_segments(file_path: str, limit_bytes: int = WHISPER_LIMIT_BYTES, info: dict = None):
+    """
+    Plan where to cut a large file so it needs the fewest Whisper requests.
+    The longest chunk that fits is worked out from the file's size and its
+    duration (or bitrate) and filled to SEGMENT_FILL_RATIO of the limit;
+    each cut then moves back to a silence within the last
+    SEGMENT_SILENCE_SEARCH_SECONDS of that length, so no chunk gets longer.
+    info is the file's probe_audio result, if the caller already has it.
+    Returns the cut times in seconds, or None if the file could not be probed.
+    """
+    size = os.path.getsize(file_path)
+    info = info or probe_audio(file_path)
+    duration = info["duration"]
+    if not duration and info["bit_rate"]:
+        duration = size * 8 / info["bit_rate"]
+    if not duration:
+        return None
+
+    max_seconds = limit_bytes * SEGMENT_FILL_RATIO * duration / size
+    # Never search more than a tenth of a chunk so chunks stay close to the limit
+    window = min(SEGMENT_SILENCE_SEARCH_SECONDS, max_seconds / 10)
+
+    cuts = []
+    previous = 0.0
+    while duration - previous > max_seconds:
+        planned = previous + max_seconds
+        silence = find_silence(file_path, planned - window, planned) if window > 0 else None
+        cuts.append(silence or planned)
+        previous = cuts[-1]
+    print(f"📐 Planned {len(cuts) + 1} chunks of up to {max_seconds:.0f}s "
+          f"({size * 8 / duration / 1000:.0f} kbps, {duration:.0f}s)")
+    return cuts
+
+
+def segment_command(file_path: str, output_pattern: str, cut_times: list = None,
+                    segment_time: float = FALLBACK_SEGMENT_SECONDS, codec: list = None) -> list:
+    """
+    FFmpeg command that splits audio at cut_times (seconds) without re-encoding,
+    or into segment_time long segments when no cut times are given.
+    codec replaces the stream copy with encoder arguments.
+    """
+    if cut_times:
+        split = ["-segment_times", ",".join(f"{cut:.3f}" for cut in cut_times)]
+    else:
+        split = ["-segment_time", f"{segment_time:g}"]
+    return [
+        "ffmpeg", "-i", file_path,
+        "-f", "segment",
+        *split,
+        *(codec or ["-c", "copy"]),
+        output_pattern
+    ]
+
+
+def segment_format(file_path: str, info: dict):
+    """
+    Return (chunk extension, encoder arguments or None) for splitting a file.
+    The streams are copied into the container ffprobe detected, whatever the
+    file is called. Containers Whisper does not take (or the audio cannot be
+    copied into) are re-encoded like compaction. If the file could not be
+    probed, its own extension is used.
+    """
+    container = SEGMENT_CONTAINERS.get(info.get("format"))
+    if container == ".webm" and info.get("codec") not in WEBM_CODECS:
+        container = None
+    if container:
+        return container, None
+    if not info.get("format"):
+        return os.path.splitext(file_path)[1] or ".mp3", None
+
+    settings = COMPACTION_FORMATS.get(AUDIO_COMPACTION, COMPACTION_FORMATS["opus"])
+    print(f"🔁 {info['format']} audio cannot be split as is, re-encoding the chunks")
+    return settings["ext"], ["-vn", "-ac", "1", "-ar", "16000", *settings["codec"], "-b:a", AUDIO_COMPACTION_BITRATE]
+
+
+def fit_chunk(chunk_path: str, limit_bytes: int = WHISPER_LIMIT_BYTES) -> list:
+    """
+    Return [chunk_path], or the pieces it was re-split into (in order) if it
+    came out over the limit, e.g. where the bitrate ran well above the average
+    the plan was based on. Pieces are named <chunk>_000, <chunk>_001, ... so
+    they sort between the chunk's neighbours.
+    """
+    size = os.path.getsize(chunk_path)
+    if size < limit_bytes:
+        return [chunk_path]
+
+    pieces = max(2, math.ceil(size / (limit_bytes * SEGMENT_FILL_RATIO)))
+    segment_time = (probe_duration(chunk_path) or FALLBACK_SEGMENT_SECONDS) / pieces
+    if segment_time < 1:
+        return [chunk_path]  # Cannot be cut any finer; let the API decide
+
+    root, ext = os.path.splitext(chunk_path)
+    print(f"✂️  {os.path.basename(chunk_path)} is {size / 1024 / 1024:.1f} MB, re-splitting into {pieces} pieces")
+    subprocess.run(
+        segment_command(chunk_path, f"{root}_%03d{ext}", segment_time=segment_time),
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.remove(chunk_path)
+
+    prefix = os.path.basename(root) + "_"
+    directory = os.path.dirname(chunk_path)
+    fitted = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith(prefix) and name.endswith(ext) and name[len(prefix):len(name) - len(ext)].isdigit():
+            fitted.extend(fit_chunk(os.path.join(directory, name), limit_bytes))
+    return fitted
+
+
+def transcribe_file(file_path: str, client, upload_name: str = None, duration: float = None) -> str:
+    """
+    Send a single audio file (< 25MB) to Whisper and return its text.
+    duration (seconds) is only used for the audio metric; without it the file
+    is probed after the transcription, and a failed probe just skips the metric.
+    """
+    def transcribe():
+        with open(file_path, "rb") as f:
+            return client.audio.transcriptions.create(
+                file=(upload_name or os.path.basename(file_path), f),
+                model=WHISPER_MODEL,
+                response_format="json",
+                language="en"
+            )
+
+    with track_stage("whisper_chunk"):
+        t = scheduler.call(WHISPER_MODEL, transcribe)
+
+    if duration is None:
+        duration = probe_duration(file_path)
+    if duration:
+        AUDIO_SECONDS.inc(duration)
+    return t.text
+
+
+class _ProgressFanout:
+    """Forwards progress reports to several reporters (e.g. a job and its checkpoint)"""
+
+    def __init__(self, *reporters):
+        self.reporters = [r for r in reporters if r]
+
+    def set_stage(self, stage: str):
+        for r in self.reporters:
+            r.set_stage(stage)
+
+    def chunk_added(self, index: int, chunk: str):
+        for r in self.reporters:
+            r.chunk_added(index, chunk)
+
+    def chunk_done(self, index: int, text: str):
+        for r in self.reporters:
+            r.chunk_done(index, text)
+
+    def chunk_failed(self, index: int, chunk: str, error: str):
+        for r in self.reporters:
+            r.chunk_failed(index, chunk, error)
+
+
+def _chunk_duration(chunk_path: str, seconds_per_byte: float = None) -> float:
+    """
+    Duration of a chunk copied out of a file with the given seconds per byte.
+    0 if unknown: the source could not be probed, so the chunk is not probed either.
+    """
+    return os.path.getsize(chunk_path) * seconds_per_byte if seconds_per_byte else 0.0
+
+
+def _submit_chunk(executor, chunk_path: str, client, index: int, progress=None, duration: float = None):
+    """
+    Queue a chunk for transcription. If a progress reporter (e.g. a background
+    job) is given, it is told when the chunk is queued and when it finishes.
+    """
+    chunk = os.path.basename(chunk_path)
+    if progress:
+        progress.chunk_added(index, chunk)
+
+    future = executor.submit(transcribe_file, chunk_path, client, duration=duration)
+
+    if progress:
+        def report(f):
+            if f.cancelled():
+                return
+            if f.exception():
+                progress.chunk_failed(index, chunk, str(f.exception()))
+            else:
+                progress.chunk_done(index, f.result())
+        future.add_done_callback(report)
+
+    return future
+
+
+def _collect_chunk_results(futures: dict, chunk_names: list) -> tuple:
+    """Wait for chunk futures (future -> index) and reassemble results in chunk order"""
+    texts = [None] * len(chunk_names)
+    failed_chunks = []
+
+    for future in as_completed(futures):
+        i = futures[future]
+        chunk = chunk_names[i]
+        try:
+            texts[i] = future.result()
+            print(f"✅ Chunk {i+1}/{len(chunk_names)} done: {chunk}")
+        except Exception as e:
+            print(f"❌ Error processing chunk {chunk}: {e}")
+            failed_chunks.append({"index": i, "chunk": chunk, "error": str(e)})
+
+    failed_chunks.sort(key=lambda f: f["index"])
+    return texts, failed_chunks
+
+
+def _reuse_done_chunks(texts: list, chunk_names: list, done_texts: dict, progress=None):
+    """Fill in chunks transcribed by an earlier attempt (see services.checkpoint_service)"""
+    for i, text in done_texts.items():
+        if i < len(texts) and texts[i] is None:
+            texts[i] = text
+            if progress:
+                progress.chunk_added(i, chunk_names[i])
+                progress.chunk_done(i, text)
+
+
+def transcribe_chunks(chunk_paths: list, client, max_workers: int = None, progress=None, done_texts: dict = None,
+                      seconds_per_byte: float = None) -> tuple:
+    """
+    Transcribe chunk files concurrently with a bounded worker pool.
+    done_texts maps chunk index -> text for chunks that are already transcribed;
+    those are not sent again. seconds_per_byte of the source gives chunk durations.
+    Returns (texts, failed_chunks): texts is in the same order as chunk_paths
+    (None for chunks that failed) and failed_chunks describes each failure.
+    """
+    done_texts = done_texts or {}
+    chunk_names = [os.path.basename(p) for p in chunk_paths]
+    pending = [i for i in range(len(chunk_paths)) if i not in done_texts]
+    workers = max(1, min(max_workers or TRANSCRIBE_WORKERS, len(pending) or 1))
+
+    print(f"🚀 Transcribing {len(pending)}/{len(chunk_paths)} chunks with {workers} workers...")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper") as executor:
+        futures = {}
+        for i in pending:
+            duration = _chunk_duration(chunk_paths[i], seconds_per_byte)
+            futures[_submit_chunk(executor, chunk_paths[i], client, i, progress, duration)] = i
+        texts, failed_chunks = _collect_chunk_results(futures, chunk_names)
+
+    _reuse_done_chunks(texts, chunk_names, done_texts, progress)
+    return texts, failed_chunks
+
+
+def segment_and_transcribe(file_path: str, chunk_dir: str, client, max_workers: int = None, progress=None,
+                           workspace=None, on_split=None) -> tuple:
+    """
+    Split audio with FFmpeg at the cuts from plan_segments and transcribe each
+    segment as soon as it is written. The segment muxer writes chunks one after
+    another, so chunk N is complete once chunk N+1 exists (or FFmpeg has exited).
+    This overlaps splitting with uploading instead of waiting for the whole
+    split to finish. A chunk that still comes out over the limit is re-split.
+    chunk_dir must be empty, since any chunk file in it is taken as FFmpeg output.
+    With a workspace, its quota is checked as each chunk is written.
+    on_split(chunk_names, seconds_per_byte) is called once the split has
+    finished, before waiting for the transcriptions (used to record the chunk
+    list in a checkpoint).
+    Returns (texts, failed_chunks) like transcribe_chunks.
+    """
+    with track_stage("segment_plan"):
+        info = probe_audio(file_path)
+        cut_times = plan_segments(file_path, info=info)
+    chunk_ext, codec = segment_format(file_path, info)
+    output_pattern = os.path.join(chunk_dir, f"chunk_%03d{chunk_ext}")
+    # Copied streams: each chunk's share of the bytes gives its duration (for the audio metric).
+    # Re-encoded chunks have another bitrate, so they are probed after transcription instead.
+    seconds_per_byte = info["duration"] / os.path.getsize(file_path) if info["duration"] and not codec else None
+    cmd = segment_command(file_path, output_pattern, cut_times, codec=codec)
+
+    workers = max(1, max_workers or TRANSCRIBE_WORKERS)
+    chunk_names = []
+    futures = {}
+
+    print(f"🚀 Splitting and transcribing with {workers} workers...")
+    if progress:
+        progress.set_stage("splitting")
+
+    # Run ffmpeg in the background (discard output to disable verbose logs)
+    ensure_ffmpeg()
+    split_started = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper")
+    segment = 0  # Next FFmpeg output to pick up; re-split chunks make chunk_names longer
+    try:
+        while True:
+            finished = process.poll() is not None
+            while (os.path.exists(output_pattern % (segment + 1))
+                   or (finished and os.path.exists(output_pattern % segment))):
+                if workspace:
+                    workspace.check_quota()
+                for chunk_path in fit_chunk(output_pattern % segment):
+                    index = len(chunk_names)
+                    chunk_names.append(os.path.basename(chunk_path))
+                    duration = None if codec else _chunk_duration(chunk_path, seconds_per_byte)
+                    futures[_submit_chunk(executor, chunk_path, client, index, progress, duration)] = index
+                    print(f"📤 Chunk {index+1} ready: {chunk_names[-1]}")
+                segment += 1
+            if finished:
+                break
+            time.sleep(SEGMENT_POLL_INTERVAL)
+
+        STAGE_DURATION.labels(stage="ffmpeg_segment").observe(time.perf_counter() - split_started)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
+
+        print(f"📦 Split into {len(chunk_names)} chunks")
+        if on_split:
+            on_split(chunk_names, seconds_per_byte)
+        if progress:
+            progress.set_stage("transcribing")
+        return _collect_chunk_results(futures, chunk_names)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def process_audio_file(file_path: str, client, max_workers: int = None, digest: str = None, progress=None,
+                       checkpoint=None, workspace=None) -> dict:
+    """
+    Transcribe an audio file, using the transcript cache when possible.
+    digest is the SHA-256 of the audio; it is computed from the file if not given.
+    progress is an optional reporter (see services.job_service.Job) that
+    receives stage changes and per-chunk results as they happen.
+    checkpoint (see services.checkpoint_service) keeps the chunks and each
+    chunk's result on disk; if it already holds the chunks of an earlier
+    attempt, only the chunks without a result are transcribed and file_path
+    is not needed.
+    workspace (see services.workspace_service) is where compacted audio and
+    chunks are written, within its quota; without one the system temp dir is used.
+
+    Returns a dictionary with 'transcript' and 'failed_chunks' keys.
+    """
+    if transcript_cache.enabled and (digest or file_path):
+        digest = digest or hash_file(file_path)
+        cached = transcript_cache.get(digest)
+        if cached is not None:
+            if progress:
+                progress.set_stage("cached")
+            return cached
+
+    if checkpoint is not None and checkpoint.segmented:
+        if progress:
+            progress.set_stage("transcribing")
+        texts, failed_chunks = transcribe_chunks(
+            checkpoint.chunk_paths(), client, max_workers, _ProgressFanout(progress, checkpoint), checkpoint.done_texts(),
+            checkpoint.seconds_per_byte
+        )
+        result = _chunk_result(texts, failed_chunks)
+    else:
+        result = _transcribe_audio_file(file_path, client, max_workers, progress, checkpoint, workspace)
+
+    # Only cache complete transcripts so a retry can recover failed chunks
+    if transcript_cache.enabled and digest and not result["failed_chunks"]:
+        transcript_cache.put(digest, result)
+    return result
+
+
+def _transcribe_audio_file(file_path: str, client, max_workers: int = None, progress=None, checkpoint=None,
+                           workspace=None) -> dict:
+    """
+    Compact the audio if enabled, then transcribe it with chunking.
+    Falls back to the original file if FFmpeg cannot re-encode it.
+    """
+    compacted_path = None
+    original_size = os.path.getsize(file_path)
+
+    if AUDIO_COMPACTION in COMPACTION_FORMATS and original_size >= AUDIO_COMPACTION_MIN_MB * 1024 * 1024:
+        if progress:
+            progress.set_stage("compacting")
+        try:
+            compacted_path = compact_audio(file_path, workspace.directory if workspace else None)
+            compacted_size = os.path.getsize(compacted_path)
+            print(f"🗜️  Compacted audio: {original_size / 1024 / 1024:.2f} MB → {compacted_size / 1024 / 1024:.2f} MB ({AUDIO_COMPACTION})")
+        except Exception as e:
+            print(f"⚠️  Audio compaction failed, using original file: {e}")
+
+    try:
+        if workspace:
+            workspace.check_quota()
+        return _transcribe_with_chunking(compacted_path or file_path, client, max_workers, progress, checkpoint, workspace)
+    finally:
+        if compacted_path and os.path.exists(compacted_path):
+            os.remove(compacted_path)
+
+
+def _chunk_result(texts: list, failed_chunks: list) -> dict:
+    """Join chunk texts into the transcript; fails only if every chunk failed"""
+    if texts and len(failed_chunks) == len(texts):
+        raise Exception(f"All {len(texts)} chunks failed to transcribe: {failed_chunks[0]['error']}")
+    if failed_chunks:
+        print(f"⚠️  {len(failed_chunks)}/{len(texts)} chunks failed: {[f['chunk'] for f in failed_chunks]}")
+
+    return {
+        "transcript": " ".join(text for text in texts if text),
+        "failed_chunks": failed_chunks,
+    }
+
+
+def _transcribe_with_chunking(file_path: str, client, max_workers: int = None, progress=None, checkpoint=None,
+                              workspace=None) -> dict:
     """
     Process audio file with automatic chunking for large files.
-    Handles files larger than 25MB by splitting them into smaller chunks.
+    Handles files larger than 25MB by splitting them into smaller chunks
+    and transcribing the chunks in parallel.
+    With a checkpoint the chunks are written into it and kept after returning
+    (not on the workspace's chunk directory, which may be tmpfs, so a resume
+    survives a restart); otherwise they go to the workspace's chunk directory.
+    Either way the workspace quota is checked as chunks are written.
     """
     file_size = os.path.getsize(file_path)
-    LIMIT_BYTES = 25 * 1024 * 1024  # 25MB
-    
-    if file_size < LIMIT_BYTES:
-        def transcribe_small_file():
-            with open(file_path, "rb") as f:
-                return client.audio.transcriptions.create(
-                    file=(os.path.basename(file_path), f),
-                    model="whisper-large-v3",
-                    response_format="json",
-                    language="en"
-                )
-        t = retry_with_backoff(transcribe_small_file)
-        return t.text
+
+    if file_size < WHISPER_LIMIT_BYTES:
+        if progress:
+            progress.set_stage("transcribing")
+            progress.chunk_added(0, os.path.basename(file_path))
+        text = transcribe_file(file_path, client)
+        if progress:
+            progress.chunk_done(0, text)
+        return {"transcript": text, "failed_chunks": []}
 
     print(f"📦 Large file detected ({file_size / 1024 / 1024:.2f} MB). Splitting with FFmpeg...")
-    
+
+    if checkpoint is not None:
+        # Only a finished split (checkpoint.segmented) is resumed chunk by chunk;
+        # whatever an interrupted one left behind is split and transcribed again
+        checkpoint.clear_chunks()
+        texts, failed_chunks = segment_and_transcribe(
+            file_path, checkpoint.chunk_dir, client, max_workers, _ProgressFanout(progress, checkpoint),
+            workspace=workspace, on_split=checkpoint.mark_segmented
+        )
+        return _chunk_result(texts, failed_chunks)
+
+    if workspace:
+        # Removed along with the workspace
+        texts, failed_chunks = segment_and_transcribe(
+            file_path, workspace.chunk_dir, client, max_workers, progress, workspace=workspace
+        )
+        return _chunk_result(texts, failed_chunks)
+
     # Create chunks directory in system temp dir (cross-platform)
     chunk_dir = os.path.join(tempfile.gettempdir(), f"chunks_{uuid.uuid4()}")
     os.makedirs(chunk_dir, exist_ok=True)
-    
-    output_pattern = os.path.join(chunk_dir, "chunk_%03d.mp3")
-    
-    # Run ffmpeg to split into 600s segments (10 mins) without re-encoding
-    cmd = [
-        "ffmpeg", "-i", file_path, 
-        "-f", "segment", 
-        "-segment_time", "600", 
-        "-c", "copy", 
-        output_pattern
-    ]
-    
-    full_text = []  # Declared before try so except block can safely reference it
+
     try:
-        # Run ffmpeg (capture output to disable verbose logs)
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
-        chunks = sorted(os.listdir(chunk_dir))
-        
-        print(f"📦 Split into {len(chunks)} chunks")
-        
-        for i, chunk in enumerate(chunks):
-            chunk_path = os.path.join(chunk_dir, chunk)
-            print(f"Processing chunk {i+1}/{len(chunks)}: {chunk}")
-            
-            try:
-                def transcribe_chunk():
-                    with open(chunk_path, "rb") as f:
-                        return client.audio.transcriptions.create(
-                            file=(chunk, f),  # Use chunk name
-                            model="whisper-large-v3",
-                            response_format="json",
-                            language="en"
-                        )
-                
-                t = retry_with_backoff(transcribe_chunk)
-                full_text.append(t.text)
-            except Exception as e:
-                print(f"❌ Error processing chunk {chunk}: {e}")
-    
-        return " ".join(full_text)
-        
-    except Exception as e:
-        print(f"❌ Error during processing: {e}")
-        # Return whatever we got or error?
-        if not full_text:
-            raise e
-        return " ".join(full_text)
+        texts, failed_chunks = segment_and_transcribe(file_path, chunk_dir, client, max_workers, progress)
+        return _chunk_result(texts, failed_chunks)
     finally:
         # Cleanup
         if os.path.exists(chunk_dir):
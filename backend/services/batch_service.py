@@ -0,0 +1,236 @@
+"""
+Batch Service
+Processes many lectures (uploaded files or links) end to end: download,
+transcription, summary and quiz. Items from every batch share one bounded
+worker pool, and their Groq calls all go through the shared rate limit
+scheduler, so throughput is set by the API quota rather than by how many
+requests a client fires. Each item reports its own stage and result as soon
+as it finishes; the batch keeps an event log like background jobs do.
+"""
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from config import BATCH_WORKERS, BATCH_MAX_PENDING, JOB_TTL_SECONDS
+from services.job_service import JobQueueFull
+from services.lecture_service import transcribe_source
+from services.summarization_service import generate_summary
+from services.quiz_service import generate_quiz_and_flashcards
+
+
+class BatchItem:
+    """One lecture in a batch; also acts as the progress reporter for process_audio_file"""
+
+    def __init__(self, batch, index: int, source: dict):
+        self.batch = batch
+        self.index = index
+        self.source = source  # {"type": "upload", "path", "filename", "digest", "workspace"} or {"type": "url", "url", "workspace"}
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.stage = "queued"
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.chunks_failed = 0
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def name(self) -> str:
+        return self.source.get("filename") or self.source.get("url")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    # Progress reporting (called from worker threads)
+
+    def set_stage(self, stage: str):
+        with self.batch._lock:
+            self.stage = stage
+            self.batch._emit("item_stage", {"index": self.index, "stage": stage})
+
+    def chunk_added(self, index: int, chunk: str):
+        with self.batch._lock:
+            self.chunks_total += 1
+
+    def chunk_done(self, index: int, text: str):
+        with self.batch._lock:
+            self.chunks_done += 1
+
+    def chunk_failed(self, index: int, chunk: str, error: str):
+        with self.batch._lock:
+            self.chunks_failed += 1
+
+    # Lifecycle
+
+    def start(self):
+        with self.batch._lock:
+            self.status = "running"
+            self.started_at = time.time()
+
+    def complete(self, result: dict):
+        with self.batch._lock:
+            self.status = "completed"
+            self.stage = "done"
+            self.result = result
+            self.finished_at = time.time()
+            self.batch._emit("item_done", {"index": self.index, "status": self.status, "result": result})
+            self.batch._item_finished()
+
+    def fail(self, error: str):
+        with self.batch._lock:
+            self.status = "failed"
+            self.error = error
+            self.finished_at = time.time()
+            self.batch._emit("item_done", {"index": self.index, "status": self.status, "error": error})
+            self.batch._item_finished()
+
+    def to_dict(self) -> dict:
+        """Snapshot of the item (caller must hold the batch lock)"""
+        return {
+            "index": self.index,
+            "name": self.name,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": {
+                "chunks_total": self.chunks_total,
+                "chunks_done": self.chunks_done,
+                "chunks_failed": self.chunks_failed,
+            },
+            "result": self.result,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class Batch:
+    """A set of lectures submitted together, with an append-only event log"""
+
+    def __init__(self, sources: list, summarize: bool = True, quiz: bool = True):
+        self.id = uuid.uuid4().hex
+        self.summarize = summarize
+        self.quiz = quiz
+        self.status = "running"  # running -> completed (every item finished, even if some failed)
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.events = []
+        self._lock = threading.Lock()
+        self.items = [BatchItem(self, index, source) for index, source in enumerate(sources)]
+
+    @property
+    def finished(self) -> bool:
+        return self.status == "completed"
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for item in self.items if not item.finished)
+
+    def _emit(self, event: str, data: dict):
+        """Append an event to the log (caller must hold the lock)"""
+        self.updated_at = time.time()
+        self.events.append({"id": len(self.events), "event": event, "data": data})
+
+    def _item_finished(self):
+        """Close the batch once the last item is done (caller must hold the lock)"""
+        if all(item.finished for item in self.items):
+            self.status = "completed"
+            failed = sum(1 for item in self.items if item.status == "failed")
+            self._emit("done", {"status": self.status, "items": len(self.items), "failed": failed})
+
+    def events_since(self, last_id: int) -> list:
+        """Return events with an id greater than last_id"""
+        with self._lock:
+            return self.events[last_id + 1:]
+
+    def to_dict(self) -> dict:
+        """Snapshot of the batch for the status endpoint"""
+        with self._lock:
+            statuses = [item.status for item in self.items]
+            return {
+                "batch_id": self.id,
+                "status": self.status,
+                "progress": {
+                    "items_total": len(statuses),
+                    "items_queued": statuses.count("queued"),
+                    "items_running": statuses.count("running"),
+                    "items_completed": statuses.count("completed"),
+                    "items_failed": statuses.count("failed"),
+                },
+                "items": [item.to_dict() for item in self.items],
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+
+
+def process_batch_item(item: BatchItem, client) -> dict:
+    """Run one lecture through download, transcription, summary and quiz"""
+    transcription = transcribe_source(item.source, client, progress=item)
+
+    result = dict(transcription)
+    if item.batch.summarize:
+        item.set_stage("summarizing")
+        result["summary"] = generate_summary(client, transcription["transcript"])
+    if item.batch.quiz:
+        item.set_stage("generating_quiz")
+        result.update(generate_quiz_and_flashcards(client, transcription["transcript"]))
+    return result
+
+
+class BatchManager:
+    """Runs batch items from every batch on one bounded thread pool"""
+
+    def __init__(self, max_workers: int, max_pending: int, ttl_seconds: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def submit(self, sources: list, client, summarize: bool = True, quiz: bool = True) -> Batch:
+        """
+        Queue every source for processing and return the batch.
+        Raises JobQueueFull if accepting the batch would exceed the pending item limit.
+        """
+        with self._lock:
+            self._prune()
+            pending = sum(batch.pending for batch in self._batches.values())
+            if pending + len(sources) > self.max_pending:
+                raise JobQueueFull(f"Too many lectures in progress ({pending}). Please try again later.")
+
+            batch = Batch(sources, summarize, quiz)
+            self._batches[batch.id] = batch
+
+        for item in batch.items:
+            self._executor.submit(self._run, item, client)
+        print(f"🗂️  Queued batch {batch.id} with {len(batch.items)} lectures")
+        return batch
+
+    def get(self, batch_id: str):
+        with self._lock:
+            return self._batches.get(batch_id)
+
+    def _run(self, item: BatchItem, client):
+        item.start()
+        try:
+            item.complete(process_batch_item(item, client))
+            print(f"✅ Batch {item.batch.id} item {item.index} completed")
+        except Exception as e:
+            print(f"❌ Batch {item.batch.id} item {item.index} failed: {type(e).__name__}: {e}")
+            traceback.print_exc()
+            item.fail(str(e))
+
+    def _prune(self):
+        """Forget finished batches older than the TTL (caller must hold the lock)"""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [batch_id for batch_id, batch in self._batches.items() if batch.finished and batch.updated_at < cutoff]
+        for batch_id in expired:
+            del self._batches[batch_id]
+
+
+batch_manager = BatchManager(BATCH_WORKERS, BATCH_MAX_PENDING, JOB_TTL_SECONDS)
@@ -0,0 +1,214 @@
+"""
+Checkpoint Service
+Keeps the state of a background transcription on disk so a failed job can
+be resumed, even after the worker restarts, without downloading, splitting
+or transcribing again what already worked.
+
+A checkpoint is a directory named after the job id:
+    manifest.json       job kind, audio digest, source file and chunk list
+    source<ext>         the downloaded/uploaded audio (until it is split)
+    chunks/             the segments produced by FFmpeg
+    results/<i>.json    status and text of each segment, written as it finishes
+
+Checkpoints are deleted once a job finishes with every segment transcribed
+and expire after CHECKPOINT_TTL_SECONDS otherwise.
+"""
+import os
+import json
+import time
+import shutil
+import threading
+
+from config import CHECKPOINT_DIR, CHECKPOINT_TTL_SECONDS
+
+
+def _write_json(path: str, data: dict):
+    """Write JSON atomically so a crash never leaves a half-written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class Checkpoint:
+    """
+    On-disk state of one job. Also acts as a progress reporter, so passing it
+    to the chunk transcription records each segment as it completes.
+    """
+
+    def __init__(self, directory: str, manifest: dict):
+        self.directory = directory
+        self.manifest = manifest
+        self.chunk_dir = os.path.join(directory, "chunks")
+        self.results_dir = os.path.join(directory, "results")
+        self._lock = threading.Lock()
+
+    @property
+    def id(self) -> str:
+        return self.manifest["id"]
+
+    @property
+    def kind(self) -> str:
+        return self.manifest["kind"]
+
+    @property
+    def digest(self):
+        return self.manifest.get("digest")
+
+    @property
+    def source_path(self):
+        source = self.manifest.get("source")
+        return os.path.join(self.directory, source) if source else None
+
+    @property
+    def segmented(self) -> bool:
+        """True once FFmpeg has split the audio and the chunk list is known"""
+        return self.manifest.get("chunks") is not None
+
+    @property
+    def seconds_per_byte(self):
+        """Audio seconds per byte of the split source, used to time the chunks (None if unknown)"""
+        return self.manifest.get("seconds_per_byte")
+
+    def chunk_paths(self) -> list:
+        return [os.path.join(self.chunk_dir, name) for name in self.manifest.get("chunks") or []]
+
+    def _save_manifest(self):
+        self.manifest["updated_at"] = time.time()
+        _write_json(os.path.join(self.directory, "manifest.json"), self.manifest)
+
+    def keep_source(self, path: str) -> str:
+        """Move the audio file into the checkpoint so a resume can reuse it; returns the new path"""
+        source = "source" + os.path.splitext(path)[1]
+        shutil.move(path, os.path.join(self.directory, source))
+        with self._lock:
+            self.manifest["source"] = source
+            self._save_manifest()
+        return self.source_path
+
+    def discard_source(self):
+        """Delete the source audio once the chunks are all a resume needs"""
+        path = self.source_path
+        if path and os.path.exists(path):
+            os.remove(path)
+        with self._lock:
+            self.manifest["source"] = None
+            self._save_manifest()
+
+    def mark_segmented(self, chunk_names: list, seconds_per_byte: float = None):
+        with self._lock:
+            self.manifest["chunks"] = list(chunk_names)
+            self.manifest["seconds_per_byte"] = seconds_per_byte
+            self._save_manifest()
+
+    def clear_chunks(self):
+        """
+        Delete the chunks and results of a split that never finished. They may
+        not match the next split (e.g. if compaction fails on one attempt and
+        works on the next), and leftover chunk files would look finished.
+        """
+        for directory in (self.chunk_dir, self.results_dir):
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+        with self._lock:
+            self.manifest["chunks"] = None
+            self._save_manifest()
+
+    def done_texts(self) -> dict:
+        """index -> text of every segment that was transcribed successfully"""
+        texts = {}
+        if not os.path.isdir(self.results_dir):
+            return texts
+        for name in os.listdir(self.results_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.results_dir, name), encoding="utf-8") as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if result.get("status") == "done":
+                texts[int(name[:-5])] = result["text"]
+        return texts
+
+    def _record(self, index: int, result: dict):
+        _write_json(os.path.join(self.results_dir, f"{index}.json"), result)
+
+    # Progress reporter interface (see services.audio_service)
+
+    def set_stage(self, stage: str):
+        pass
+
+    def chunk_added(self, index: int, chunk: str):
+        pass
+
+    def chunk_done(self, index: int, text: str):
+        self._record(index, {"status": "done", "text": text})
+
+    def chunk_failed(self, index: int, chunk: str, error: str):
+        self._record(index, {"status": "failed", "chunk": chunk, "error": error})
+
+
+class CheckpointStore:
+    """Creates, loads and expires job checkpoints under one directory"""
+
+    def __init__(self, root: str, ttl_seconds: int):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _directory(self, checkpoint_id: str) -> str:
+        return os.path.join(self.root, os.path.basename(checkpoint_id))
+
+    def create(self, checkpoint_id: str, kind: str, digest: str = None) -> Checkpoint:
+        """Start a fresh checkpoint for a job (replacing any previous one with the same id)"""
+        with self._lock:
+            self._prune()
+            directory = self._directory(checkpoint_id)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(os.path.join(directory, "chunks"))
+            os.makedirs(os.path.join(directory, "results"))
+
+            now = time.time()
+            checkpoint = Checkpoint(directory, {
+                "id": checkpoint_id,
+                "kind": kind,
+                "digest": digest,
+                "source": None,
+                "chunks": None,
+                "created_at": now,
+                "updated_at": now,
+            })
+            checkpoint._save_manifest()
+        return checkpoint
+
+    def load(self, checkpoint_id: str):
+        """Return the checkpoint for a job id, or None if there is nothing to resume"""
+        directory = self._directory(checkpoint_id)
+        try:
+            with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return Checkpoint(directory, manifest)
+
+    def delete(self, checkpoint: Checkpoint):
+        shutil.rmtree(checkpoint.directory, ignore_errors=True)
+        print(f"🧹 Removed checkpoint {checkpoint.id}")
+
+    def _prune(self):
+        """Remove checkpoints not updated within the TTL (caller must hold the lock)"""
+        if not os.path.isdir(self.root):
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.root):
+            manifest_path = os.path.join(self.root, name, "manifest.json")
+            try:
+                expired = os.path.getmtime(manifest_path) < cutoff
+            except OSError:
+                expired = True  # Never finished being created
+            if expired:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+checkpoint_store = CheckpointStore(CHECKPOINT_DIR, CHECKPOINT_TTL_SECONDS)
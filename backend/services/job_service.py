@@ -0,0 +1,188 @@
+"""
+Job Service
+Runs long transcriptions in the background so HTTP requests return immediately.
+Each job records its current stage, per-chunk progress and an append-only list
+of events (stage changes, partial transcript text) that clients can poll or
+stream over Server-Sent Events.
+"""
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from config import JOB_WORKERS, JOB_MAX_PENDING, JOB_TTL_SECONDS
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already running or waiting"""
+
+
+class JobRunning(Exception):
+    """Raised when resuming a job that has not finished yet"""
+
+
+class Job:
+    """State and event log of a single background job"""
+
+    def __init__(self, kind: str, job_id: str = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.stage = "queued"
+        self.stages = []
+        self.chunks = {}  # index -> {"chunk", "status"}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.events = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def _emit(self, event: str, data: dict):
+        """Append an event to the log (caller must hold the lock)"""
+        self.updated_at = time.time()
+        self.events.append({"id": len(self.events), "event": event, "data": data})
+
+    def events_since(self, last_id: int) -> list:
+        """Return events with an id greater than last_id"""
+        with self._lock:
+            return self.events[last_id + 1:]
+
+    # Progress reporting (called from worker threads)
+
+    def set_stage(self, stage: str):
+        with self._lock:
+            now = time.time()
+            if self.stages and self.stages[-1]["finished_at"] is None:
+                self.stages[-1]["finished_at"] = now
+            self.stage = stage
+            self.stages.append({"stage": stage, "started_at": now, "finished_at": None})
+            self._emit("stage", {"stage": stage})
+
+    def chunk_added(self, index: int, chunk: str):
+        with self._lock:
+            self.chunks[index] = {"chunk": chunk, "status": "pending"}
+            self._emit("chunk_added", {"index": index, "chunk": chunk})
+
+    def chunk_done(self, index: int, text: str):
+        with self._lock:
+            self.chunks[index]["status"] = "done"
+            self._emit("chunk", {"index": index, "text": text})
+
+    def chunk_failed(self, index: int, chunk: str, error: str):
+        with self._lock:
+            self.chunks[index]["status"] = "failed"
+            self._emit("chunk_failed", {"index": index, "chunk": chunk, "error": error})
+
+    # Lifecycle
+
+    def start(self):
+        with self._lock:
+            self.status = "running"
+            self._emit("status", {"status": self.status})
+
+    def complete(self, result: dict):
+        with self._lock:
+            self._finish_stage()
+            self.status = "completed"
+            self.stage = "done"
+            self.result = result
+            self._emit("done", {"status": self.status, "result": result})
+
+    def fail(self, error: str):
+        with self._lock:
+            self._finish_stage()
+            self.status = "failed"
+            self.error = error
+            self._emit("done", {"status": self.status, "error": error})
+
+    def _finish_stage(self):
+        if self.stages and self.stages[-1]["finished_at"] is None:
+            self.stages[-1]["finished_at"] = time.time()
+
+    def to_dict(self) -> dict:
+        """Snapshot of the job for the status endpoint"""
+        with self._lock:
+            statuses = [c["status"] for c in self.chunks.values()]
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stage": self.stage,
+                "stages": [dict(s) for s in self.stages],
+                "progress": {
+                    "chunks_total": len(statuses),
+                    "chunks_done": statuses.count("done"),
+                    "chunks_failed": statuses.count("failed"),
+                },
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and keeps them for a while for polling"""
+
+    def __init__(self, max_workers: int, max_pending: int, ttl_seconds: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, func, *args, job_id: str = None) -> Job:
+        """
+        Queue func(job, *args) to run in the background and return the job.
+        The function's return value becomes the job result.
+        job_id reuses the id of an earlier, finished job (used to resume it).
+        Raises JobQueueFull if the worker pool and queue are saturated and
+        JobRunning if the job with that id is still in progress.
+        """
+        with self._lock:
+            self._prune()
+            existing = self._jobs.get(job_id) if job_id else None
+            if existing and not existing.finished:
+                raise JobRunning("This job is still in progress.")
+            active = sum(1 for job in self._jobs.values() if not job.finished)
+            if active >= self.max_workers + self.max_pending:
+                raise JobQueueFull(f"Too many jobs in progress ({active}). Please try again later.")
+
+            job = Job(kind, job_id)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, func, args)
+        print(f"🗂️  Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, func, args):
+        job.start()
+        try:
+            result = func(job, *args)
+            job.complete(result)
+            print(f"✅ Job {job.id} completed")
+        except Exception as e:
+            print(f"❌ Job {job.id} failed: {type(e).__name__}: {e}")
+            traceback.print_exc()
+            job.fail(str(e))
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL (caller must hold the lock)"""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(JOB_WORKERS, JOB_MAX_PENDING, JOB_TTL_SECONDS)
@@ -0,0 +1,148 @@
+"""
+Lecture Service
+End-to-end processing of one lecture: get the transcript once (captions,
+download or upload), then generate the summary and the quiz at the same
+time. Results are yielded one by one as soon as each is ready, so callers
+can stream them instead of waiting for the slowest step.
+"""
+import asyncio
+import threading
+
+from executors import audio_stage, download_stage, llm_stage, admit_all
+from services.audio_service import process_audio_file
+from services.summarization_service import generate_summary
+from services.quiz_service import generate_quiz_and_flashcards
+from services.youtube_service import download_audio_from_generic_link
+from services.youtube_transcript_service import get_youtube_transcript, is_youtube_url
+
+
+def fetch_source(source: dict, progress=None) -> dict:
+    """
+    Network step of a lecture source: {"transcript"} from YouTube captions or
+    {"path"} of the audio, downloaded into the workspace for a link.
+    source is {"type": "upload", "path", "digest", "workspace"} for an upload
+    saved in its workspace or {"type": "url", "url", "workspace"} for a link.
+    """
+    if source["type"] != "url":
+        return {"path": source["path"]}
+
+    if is_youtube_url(source["url"]):
+        if progress:
+            progress.set_stage("fetching_captions")
+        return {"transcript": get_youtube_transcript(source["url"])}
+
+    workspace = source["workspace"]
+    if progress:
+        progress.set_stage("downloading")
+    audio_path = download_audio_from_generic_link(source["url"], workspace.directory, workspace.remaining_bytes())
+    workspace.check_quota()
+    return {"path": audio_path}
+
+
+def transcribe_fetched(source: dict, fetched: dict, client, progress=None) -> dict:
+    """
+    FFmpeg/Whisper step: transcribe what fetch_source returned, then release the workspace.
+    Returns a dictionary with 'transcript' and 'failed_chunks' keys.
+    """
+    try:
+        if "transcript" in fetched:
+            return {"transcript": fetched["transcript"], "failed_chunks": []}
+        return process_audio_file(
+            fetched["path"], client, digest=source.get("digest"), progress=progress, workspace=source["workspace"]
+        )
+    finally:
+        source["workspace"].release()
+
+
+def transcribe_source(source: dict, client, progress=None) -> dict:
+    """
+    Fetch and transcribe a lecture source in the calling thread, then release
+    its workspace. Used by batch items, which run on the batch pool rather
+    than the stages (see executors.py).
+    """
+    try:
+        fetched = fetch_source(source, progress)
+    except Exception:
+        source["workspace"].release()
+        raise
+    return transcribe_fetched(source, fetched, client, progress)
+
+
+async def _transcribe(source: dict, client) -> dict:
+    """
+    Fetch on the download stage and transcribe on the audio stage. Slots are
+    taken for both up front, so a link is not downloaded only to be refused.
+    Once the audio step has started it owns the workspace; if it never starts
+    (an error, or the caller was cancelled while it was queued) it is released here.
+    """
+    # Whoever takes this first releases the workspace: the audio step or this coroutine
+    owner = threading.Lock()
+    admissions = []
+
+    def transcribe(fetched):
+        if not owner.acquire(blocking=False):
+            return None  # The caller already gave up and released the workspace
+        return transcribe_fetched(source, fetched, client)
+
+    try:
+        stages = [download_stage, audio_stage] if source["type"] == "url" else [audio_stage]
+        admissions = admit_all(*stages)
+        fetched = {"path": source.get("path")}
+        if source["type"] == "url":
+            fetched = await admissions[0].run(fetch_source, source)
+            admissions[0].release()  # Free the download slot while transcribing
+        return await admissions[-1].run(transcribe, fetched)
+    finally:
+        for admission in admissions:
+            admission.release()
+        if owner.acquire(blocking=False):
+            source["workspace"].release()
+
+
+async def lecture_artifacts(source: dict, client, summarize: bool = True, quiz: bool = True):
+    """
+    Async generator of (artifact, data) pairs for one lecture: 'transcript'
+    first, then 'summary' and 'quiz' in whichever order they finish. A failed
+    step yields ('error', {"artifact", "error"}); the other step still runs.
+    Steps run on the download, audio and llm stages, so a step refused
+    because its stage is saturated is reported as an error too.
+    """
+    try:
+        transcription = await _transcribe(source, client)
+    except Exception as e:
+        print(f"❌ Lecture transcription failed: {type(e).__name__}: {e}")
+        yield "error", {"artifact": "transcript", "error": str(e)}
+        return
+    yield "transcript", transcription
+
+    transcript = transcription["transcript"]
+    if not transcript or not transcript.strip():
+        return
+
+    async def generate(artifact: str, func):
+        try:
+            return artifact, await llm_stage.run(func, client, transcript), None
+        except Exception as e:
+            return artifact, None, e
+
+    steps = []
+    if summarize:
+        steps.append(("summary", generate_summary))
+    if quiz:
+        steps.append(("quiz", generate_quiz_and_flashcards))
+    tasks = [asyncio.ensure_future(generate(artifact, func)) for artifact, func in steps]
+
+    try:
+        for finished in asyncio.as_completed(tasks):
+            artifact, result, error = await finished
+            if error:
+                print(f"❌ Lecture {artifact} failed: {type(error).__name__}: {error}")
+                yield "error", {"artifact": artifact, "error": str(error)}
+            elif artifact == "summary":
+                yield "summary", {"summary": result}
+            else:
+                yield "quiz", result
+    finally:
+        # Stop waiting if the client went away (queued steps are dropped, running ones finish on their own)
+        for task in tasks:
+            task.cancel()
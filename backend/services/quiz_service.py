@@ -1,20 +1,99 @@
+"""
+Quiz Service
+Builds multiple choice questions and flashcards from a transcript or notes.
+
+In "sectioned" mode (QUIZ_MODE) the content is split into sections that are
+turned into questions concurrently, with the question count spread over the
+sections by length, so the whole lecture is covered in about the time of one
+request. Every reply is checked against the quiz schema and only sections
+whose reply is invalid are asked again. The results are merged in lecture
+order with duplicate questions and flashcards removed.
+"""
+import re
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+from config import QUIZ_MODE, QUIZ_PARALLELISM, QUIZ_SECTION_ATTEMPTS, QUIZ_MAX_QUESTIONS
+from chunker import chunk_text, token_budget, estimate_tokens
+from rate_limiter import scheduler
+from services.result_cache import result_cache
+from metrics import track_stage, record_llm_usage
+
+QUIZ_MODEL = "llama-3.3-70b-versatile"
+# Bump when the prompt below changes so cached quizzes are regenerated
+QUIZ_PROMPT_VERSION = "2"
+# Number of excerpts sampled across a lecture that is too long for one request ("single" mode)
+QUIZ_EXCERPTS = 6
+# Each section only yields a few questions, so sections use the whole input budget
+QUIZ_SECTION_TOKENS = token_budget(QUIZ_MODEL)
+# Reply tokens per section: a fixed allowance plus enough for each question and flashcard
+QUIZ_BASE_REPLY_TOKENS = 256
+QUIZ_REPLY_TOKENS_PER_QUESTION = 160
+QUIZ_MAX_REPLY_TOKENS = 2048
+# Questions one section can ask for without the reply being cut off
+QUIZ_MAX_QUESTIONS_PER_SECTION = (QUIZ_MAX_REPLY_TOKENS - QUIZ_BASE_REPLY_TOKENS) // QUIZ_REPLY_TOKENS_PER_QUESTION
+
+SYSTEM_PROMPT = "You are a helpful education assistant. You ONLY output valid JSON. No markdown, no explanations, just pure JSON."
+
+
+class QuizFormatError(ValueError):
+    """The model's reply is not a quiz in the expected JSON structure"""
+
+
+def _select_excerpts(content_text: str, max_tokens: int) -> str:
+    """
+    Fit the content into max_tokens without dropping the end of the lecture.
+    Long content is split on sentence boundaries into small pieces and evenly
+    spaced pieces are taken from the whole text, start to finish.
+    """
+    chunks = chunk_text(content_text, max_tokens // QUIZ_EXCERPTS)
+    if len(chunks) <= QUIZ_EXCERPTS:
+        return "\n\n".join(chunks)
+
+    step = len(chunks) / QUIZ_EXCERPTS
+    picked = [chunks[int(i * step)] for i in range(QUIZ_EXCERPTS)]
+    print(f"📚 Long content: using {QUIZ_EXCERPTS} excerpts spread over {len(chunks)} sections")
+    return "\n\n[...]\n\n".join(picked)
+
 
-def generate_quiz_and_flashcards(client, content_text: str) -> dict:
+def question_count(word_count: int, max_questions: int = 15) -> int:
+    """1 question per ~100 words, at least 5 and at most max_questions"""
+    return min(max_questions, max(5, word_count // 100))
+
+
+def generate_quiz_and_flashcards(client, content_text: str, refresh: bool = False) -> dict:
     """
     Generate quiz questions and flashcards from content.
     Returns a dictionary with 'quiz' and 'flashcards' keys.
+    Results are cached like summaries; refresh=True regenerates.
+    Raises ValueError if the content is empty or only whitespace.
     """
-    # Calculate number of questions based on content length
-    word_count = len(content_text.split())
-    
-    # Dynamic question count: 1 question per ~100 words, min 5, max 15
-    num_questions = min(15, max(5, word_count // 100))
-    num_flashcards = num_questions  # Same number of flashcards
-    
-    print(f"📊 Content: {word_count} words → Generating {num_questions} questions and {num_flashcards} flashcards")
-    
-    prompt = f"""Based on the following text, generate:
+    if not content_text or not content_text.strip():
+        raise ValueError("No text provided")
+
+    params = {"temperature": 0.7, "mode": QUIZ_MODE}
+    if QUIZ_MODE == "sectioned":
+        params.update(section_tokens=QUIZ_SECTION_TOKENS, max_questions=QUIZ_MAX_QUESTIONS)
+    else:
+        params.update(max_tokens=2048, excerpts=QUIZ_EXCERPTS)
+    cache_key = result_cache.make_key("quiz", content_text, QUIZ_MODEL, params, QUIZ_PROMPT_VERSION)
+    if not refresh:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            print("⚡ Quiz cache hit")
+            return cached
+
+    if QUIZ_MODE == "sectioned":
+        result = _generate_sectioned_quiz(client, content_text)
+    else:
+        result = _generate_quiz_and_flashcards(client, content_text)
+    result_cache.put(cache_key, result)
+    return result
+
+
+def _quiz_prompt(num_questions: int, num_flashcards: int, text: str, part: str = None) -> str:
+    source = f"the following part of a lecture ({part})" if part else "the following text"
+    return f"""Based on {source}, generate:
 1. {num_questions} Multiple Choice Questions (MCQs) with 4 options each and the correct answer
 2. {num_flashcards} Flashcards with a question/term (front) and answer/definition (back)
 
@@ -29,26 +108,46 @@ Return ONLY a valid JSON object with this exact structure:
 }}
 
 Text:
-{content_text[:30000]}"""
-
-    chat_completion = client.chat.completions.create(
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful education assistant. You ONLY output valid JSON. No markdown, no explanations, just pure JSON."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        model="llama-3.3-70b-versatile",
-        temperature=0.7,
-        max_tokens=2048,
-        response_format={"type": "json_object"}
-    )
-    
-    result_text = chat_completion.choices[0].message.content
+{text}"""
+
+
+def _complete_json(client, prompt: str, max_tokens: int) -> str:
+    """Run one JSON-mode chat completion and return the raw reply"""
+    def create():
+        return client.chat.completions.create(
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            model=QUIZ_MODEL,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+
+    tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt) + max_tokens
+    with track_stage("quiz_llm"):
+        chat_completion = scheduler.call(QUIZ_MODEL, create, tokens)
+    record_llm_usage(QUIZ_MODEL, chat_completion)
+    return chat_completion.choices[0].message.content
+
+
+def _generate_quiz_and_flashcards(client, content_text: str) -> dict:
+    """Call the LLM once to build the quiz and flashcards ("single" mode)"""
+    word_count = len(content_text.split())
+    num_questions = question_count(word_count)
+    num_flashcards = num_questions  # Same number of flashcards
+
+    print(f"📊 Content: {word_count} words → Generating {num_questions} questions and {num_flashcards} flashcards")
+
+    prompt = _quiz_prompt(num_questions, num_flashcards, _select_excerpts(content_text, token_budget(QUIZ_MODEL)))
+    result_text = _complete_json(client, prompt, 2048)
     try:
         result_json = json.loads(result_text)
     except json.JSONDecodeError as e:
@@ -56,3 +155,146 @@ Text:
         raise Exception("The AI returned an invalid response. Please try again.")
     
     return result_json
+
+
+def _text(value) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _valid_question(item):
+    """Return the question normalized, or None if it doesn't match the schema"""
+    if not isinstance(item, dict):
+        return None
+    question = _text(item.get("question"))
+    options = item.get("options")
+    if not question or not isinstance(options, list) or len(options) != 4:
+        return None
+    options = [_text(option) for option in options]
+    if not all(options):
+        return None
+
+    answer = _text(item.get("answer"))
+    if answer not in options and len(answer) == 1 and answer.upper() in "ABCD":
+        answer = options["ABCD".index(answer.upper())]  # Answer given as a letter
+    if answer not in options:
+        return None
+    return {"question": question, "options": options, "answer": answer}
+
+
+def _valid_flashcard(item):
+    """Return the flashcard normalized, or None if it doesn't match the schema"""
+    if not isinstance(item, dict):
+        return None
+    front, back = _text(item.get("front")), _text(item.get("back"))
+    if not front or not back:
+        return None
+    return {"front": front, "back": back}
+
+
+def parse_quiz(reply: str) -> dict:
+    """
+    Parse a model reply into {"quiz": [...], "flashcards": [...]}.
+    Questions and flashcards that don't match the schema are dropped;
+    raises QuizFormatError if the reply isn't JSON or no question is usable.
+    """
+    try:
+        data = json.loads(reply)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise QuizFormatError(f"Reply is not valid JSON: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get("quiz"), list):
+        raise QuizFormatError("Reply has no 'quiz' list")
+
+    quiz = [q for q in map(_valid_question, data["quiz"]) if q]
+    if not quiz:
+        raise QuizFormatError("Reply has no valid questions")
+    flashcards = data.get("flashcards") if isinstance(data.get("flashcards"), list) else []
+    return {"quiz": quiz, "flashcards": [f for f in map(_valid_flashcard, flashcards) if f]}
+
+
+def _split_counts(total: int, weights: list) -> list:
+    """Split total into one count per weight (at least 1 each), proportional to the weights"""
+    if not any(weights):
+        weights = [1] * len(weights)  # No weights to go by: split evenly
+    total = max(total, len(weights))
+    spare = total - len(weights)
+    weight_sum = sum(weights)
+    shares = [spare * w / weight_sum for w in weights]
+    counts = [1 + int(share) for share in shares]
+    # Hand out what rounding down left over to the largest remainders
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def _dedupe_key(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def merge_quizzes(parts: list) -> dict:
+    """Concatenate section quizzes in order, dropping repeated questions and flashcards"""
+    quiz, flashcards = [], []
+    seen_questions, seen_fronts = set(), set()
+    for part in parts:
+        for question in part["quiz"]:
+            key = _dedupe_key(question["question"])
+            if key not in seen_questions:
+                seen_questions.add(key)
+                quiz.append(question)
+        for card in part["flashcards"]:
+            key = _dedupe_key(card["front"])
+            if key not in seen_fronts:
+                seen_fronts.add(key)
+                flashcards.append(card)
+    return {"quiz": quiz, "flashcards": flashcards}
+
+
+def _generate_sectioned_quiz(client, content_text: str) -> dict:
+    """Generate questions for every section of the content concurrently and merge them"""
+    word_count = len(content_text.split())
+    num_questions = question_count(word_count, QUIZ_MAX_QUESTIONS)
+
+    # Use smaller sections when the budget alone would leave a section with too many questions
+    sections_needed = -(-num_questions // QUIZ_MAX_QUESTIONS_PER_SECTION)
+    section_tokens = min(QUIZ_SECTION_TOKENS, max(1, -(-estimate_tokens(content_text) // sections_needed)))
+    sections = chunk_text(content_text, section_tokens)
+    if len(sections) > num_questions:
+        # More sections than questions: keep evenly spaced ones so the whole lecture is still sampled
+        step = len(sections) / num_questions
+        sections = [sections[int(i * step)] for i in range(num_questions)]
+    counts = _split_counts(num_questions, [len(section.split()) for section in sections])
+
+    print(f"📊 Content: {word_count} words → Generating {num_questions} questions and {num_questions} flashcards")
+    if len(sections) > 1:
+        print(f"📦 Long content. Generating questions for {len(sections)} sections in parallel...")
+
+    def generate(i):
+        part = f"part {i+1} of {len(sections)}" if len(sections) > 1 else None
+        prompt = _quiz_prompt(counts[i], counts[i], sections[i], part)
+        max_tokens = min(QUIZ_MAX_REPLY_TOKENS, QUIZ_BASE_REPLY_TOKENS + QUIZ_REPLY_TOKENS_PER_QUESTION * counts[i])
+        attempts = max(1, QUIZ_SECTION_ATTEMPTS)
+        for attempt in range(1, attempts + 1):
+            try:
+                result = parse_quiz(_complete_json(client, prompt, max_tokens))
+            except QuizFormatError as e:
+                print(f"⚠️  Quiz section {i+1} attempt {attempt}/{attempts} invalid: {e}")
+                max_tokens = QUIZ_MAX_REPLY_TOKENS  # A reply cut off at max_tokens is the usual cause
+                continue
+            except Exception as e:
+                print(f"❌ Error generating quiz section {i+1}: {e}")
+                return None
+            return {"quiz": result["quiz"][:counts[i]], "flashcards": result["flashcards"][:counts[i]]}
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, QUIZ_PARALLELISM), thread_name_prefix="quiz") as executor:
+        results = list(executor.map(generate, range(len(sections))))
+
+    parts = [r for r in results if r]
+    if not parts:
+        raise Exception("The AI returned an invalid response. Please try again.")
+    if len(parts) < len(sections):
+        print(f"⚠️  {len(sections) - len(parts)}/{len(sections)} quiz sections failed")
+
+    result = merge_quizzes(parts)
+    print(f"✅ Quiz generated: {len(result['quiz'])} questions, {len(result['flashcards'])} flashcards")
+    return result
@@ -0,0 +1,142 @@
+"""
+Result Cache
+Two-tier cache for generated summaries and quizzes: an in-memory LRU in
+front of a SQLite table. The key combines the SHA-256 of the input text, the
+model, the generation parameters and the prompt template version, so
+changing any of them produces a different key. When a new result is stored,
+older entries for the same text and kind are deleted.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+
+from config import RESULT_CACHE_PATH, RESULT_CACHE_MEMORY_ENTRIES, RESULT_CACHE_MAX_ENTRIES
+
+CacheKey = namedtuple("CacheKey", ["key", "kind", "digest"])
+
+
+class ResultCache:
+    """In-memory LRU backed by SQLite"""
+
+    def __init__(self, db_path: str, memory_entries: int, max_entries: int):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_digest ON results (kind, digest)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(kind: str, text: str, model: str, params: dict, prompt_version: str) -> CacheKey:
+        """Build the cache key for generating `kind` from text with the given settings"""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        material = json.dumps(
+            {"kind": kind, "digest": digest, "model": model, "params": params, "prompt_version": prompt_version},
+            sort_keys=True
+        )
+        return CacheKey(hashlib.sha256(material.encode("utf-8")).hexdigest(), kind, digest)
+
+    def _remember(self, key: str, value):
+        """Insert into the memory tier (caller must hold the lock)"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, cache_key: CacheKey):
+        """Return the cached value or None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if cache_key.key in self._memory:
+                self._memory.move_to_end(cache_key.key)
+                self.memory_hits += 1
+                return self._memory[cache_key.key]
+
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (cache_key.key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), cache_key.key))
+            self._db.commit()
+            value = json.loads(row[0])
+            self._remember(cache_key.key, value)
+            self.disk_hits += 1
+            return value
+
+    def put(self, cache_key: CacheKey, value):
+        """Store a value, replacing stale entries for the same text and kind"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            stale = [row[0] for row in self._db.execute(
+                "SELECT key FROM results WHERE kind = ? AND digest = ? AND key != ?",
+                (cache_key.kind, cache_key.digest, cache_key.key)
+            )]
+            for key in stale:
+                self._memory.pop(key, None)
+            self._db.execute(
+                "DELETE FROM results WHERE kind = ? AND digest = ? AND key != ?",
+                (cache_key.kind, cache_key.digest, cache_key.key)
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, kind, digest, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key.key, cache_key.kind, cache_key.digest, json.dumps(value), now, now)
+            )
+            # Keep the table bounded: drop the least recently used rows
+            self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+            self._remember(cache_key.key, value)
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            rows = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return {
+                "enabled": True,
+                "memory_entries": len(self._memory),
+                "disk_entries": rows,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+result_cache = ResultCache(RESULT_CACHE_PATH, RESULT_CACHE_MEMORY_ENTRIES, RESULT_CACHE_MAX_ENTRIES)
@@ -1,59 +1,28 @@
-def generate_summary(client, transcript: str) -> str:
-    """
-    Generate a formatted summary from a transcript.
-    Handles large transcripts by chunking them.
-    """
-    print(f"📝 Summarizing transcript ({len(transcript)} characters)...")
-    
-    # Chunking logic for large transcripts
-    CHUNK_SIZE = 15000
-    if len(transcript) > CHUNK_SIZE:
-        chunks = [transcript[i:i+CHUNK_SIZE] for i in range(0, len(transcript), CHUNK_SIZE)]
-        print(f"📦 Large transcript. Splitting into {len(chunks)} chunks...")
-        
-        raw_summaries = []
-        for i, chunk in enumerate(chunks):
-            print(f"Processing summary section {i+1}/{len(chunks)}...")
-            try:
-                completion = client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": """You are a helpful assistant that summarizes lecture transcripts into clear, organized notes.
+from concurrent.futures import ThreadPoolExecutor
 
-FORMATTING RULES:
+from config import SUMMARY_MODE, SUMMARY_PARALLELISM, SUMMARY_REDUCE_FAN_IN
+from rate_limiter import scheduler
+from chunker import chunk_text, token_budget, estimate_tokens
+from services.result_cache import result_cache
+from metrics import track_stage, record_llm_usage
+
+SUMMARY_MODEL = "llama-3.3-70b-versatile"
+# Bump when the prompts below change so cached summaries are regenerated
+SUMMARY_PROMPT_VERSION = "2"
+# Sections use half the model budget so the map step has more parallelism
+SECTION_TOKENS = token_budget(SUMMARY_MODEL) // 2
+# Repeat the end of the previous section so ideas split across a cut keep their context
+SECTION_OVERLAP_TOKENS = 50
+
+FORMATTING_RULES = """FORMATTING RULES:
 - For headings, write the heading text on one line, then add underline on next line using equal signs (===)
 - Use bullet points with the • symbol (not asterisks)
 - Keep it concise and well-organized
 - Use proper spacing between sections"""
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Summarize this section of the lecture (Part {i+1}/{len(chunks)}):\n\n{chunk}"
-                        }
-                    ],
-                    model="llama-3.3-70b-versatile",
-                    temperature=0.7,
-                    max_tokens=1024
-                )
-                raw_summaries.append(completion.choices[0].message.content)
-            except Exception as e:
-                print(f"❌ Error summarizing chunk {i}: {e}")
-        
-        summary = "\n\n".join(raw_summaries)
-    else:
-        # Normal Processing
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a helpful assistant that summarizes lecture transcripts into clear, organized notes.
 
-FORMATTING RULES:
-- For headings, write the heading text on one line, then add underline on next line using equal signs (===)
-- Use bullet points with the • symbol (not asterisks)
-- Keep it concise and well-organized
-- Use proper spacing between sections
+SYSTEM_PROMPT = f"""You are a helpful assistant that summarizes lecture transcripts into clear, organized notes.
+
+{FORMATTING_RULES}
 
 Example format:
 Introduction to Topic
@@ -66,17 +35,264 @@ Main Concepts
 =============
 • Core idea one
 • Core idea two"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Summarize the following lecture transcript into organized notes with underlined headings and bullet points:\n\n{transcript}"
-                }
+
+SECTION_SYSTEM_PROMPT = f"""You are a helpful assistant that summarizes lecture transcripts into clear, organized notes.
+
+{FORMATTING_RULES}"""
+
+REDUCE_SYSTEM_PROMPT = f"""You are a helpful assistant that merges partial lecture notes into one coherent set of notes.
+The partial notes cover consecutive parts of the same lecture, in order.
+Combine them into a single document: merge sections about the same topic, remove repeated points,
+and keep the lecture's order. Do not mention that the notes came from separate parts.
+
+{FORMATTING_RULES}"""
+
+
+def _complete(client, system_prompt: str, user_prompt: str, max_tokens: int = 1024) -> str:
+    """Run a single chat completion and return the text"""
+    def create():
+        return client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
             ],
-            model="llama-3.3-70b-versatile",
+            model=SUMMARY_MODEL,
             temperature=0.7,
-            max_tokens=1024
+            max_tokens=max_tokens
         )
-        summary = chat_completion.choices[0].message.content
+
+    tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + max_tokens
+    with track_stage("summarize_llm"):
+        completion = scheduler.call(SUMMARY_MODEL, create, tokens)
+    record_llm_usage(SUMMARY_MODEL, completion)
+    return completion.choices[0].message.content
+
+
+def _stream_complete(client, system_prompt: str, user_prompt: str, max_tokens: int = 1024):
+    """
+    Like _complete, but yields the text as the model produces it.
+    Rate limits and errors before the first token are retried by the scheduler;
+    a stream that breaks halfway raises.
+    """
+    def create():
+        return client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            model=SUMMARY_MODEL,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            stream=True
+        )
+
+    tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + max_tokens
+    with track_stage("summarize_llm"):
+        stream = scheduler.call(SUMMARY_MODEL, create, tokens)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                # Groq reports token usage on the last chunk
+                if getattr(chunk, "x_groq", None) is not None:
+                    record_llm_usage(SUMMARY_MODEL, chunk.x_groq)
+        finally:
+            stream.close()
+
+
+def _summarize_sections(client, chunks: list, executor) -> list:
+    """Map step: summarize every transcript section concurrently, keeping order"""
+    def summarize(i):
+        print(f"Processing summary section {i+1}/{len(chunks)}...")
+        try:
+            return _complete(
+                client,
+                SECTION_SYSTEM_PROMPT,
+                f"Summarize this section of the lecture (Part {i+1}/{len(chunks)}):\n\n{chunks[i]}"
+            )
+        except Exception as e:
+            print(f"❌ Error summarizing chunk {i}: {e}")
+            return None
+
+    results = list(executor.map(summarize, range(len(chunks))))
+    return [r for r in results if r]
+
+
+def _merge_prompt(group: list) -> str:
+    joined = "\n\n".join(f"--- Part {i+1} ---\n{notes}" for i, notes in enumerate(group))
+    return f"Merge these partial lecture notes into one set of organized notes:\n\n{joined}"
+
+
+def _reduce_levels(client, partials: list, executor) -> list:
+    """
+    Merge partial notes in groups of SUMMARY_REDUCE_FAN_IN until at most one
+    group is left, and return that group. Groups on the same level run
+    concurrently, so latency grows with the depth of the tree rather than the
+    number of sections.
+    """
+    fan_in = max(2, SUMMARY_REDUCE_FAN_IN)
+    level = 1
+
+    while len(partials) > fan_in:
+        groups = [partials[i:i+fan_in] for i in range(0, len(partials), fan_in)]
+        print(f"🔀 Reduce level {level}: merging {len(partials)} partial notes into {len(groups)}...")
+
+        def merge(group):
+            if len(group) == 1:
+                return group[0]
+            try:
+                return _complete(client, REDUCE_SYSTEM_PROMPT, _merge_prompt(group))
+            except Exception as e:
+                # Fall back to the unmerged notes rather than losing them
+                print(f"❌ Error merging notes: {e}")
+                return "\n\n".join(group)
+
+        partials = list(executor.map(merge, groups))
+        level += 1
+
+    return partials
+
+
+def _reduce_summaries(client, partials: list, executor) -> str:
+    """Reduce step: merge the partial notes level by level into a single document"""
+    partials = _reduce_levels(client, partials, executor)
+    if len(partials) <= 1:
+        return partials[0] if partials else ""
+
+    print(f"🔀 Final merge of {len(partials)} partial notes...")
+    try:
+        return _complete(client, REDUCE_SYSTEM_PROMPT, _merge_prompt(partials), max_tokens=2048)
+    except Exception as e:
+        print(f"❌ Error merging notes: {e}")
+        return "\n\n".join(partials)
+
+
+def _summary_cache_key(transcript: str):
+    params = {
+        "temperature": 0.7,
+        "mode": SUMMARY_MODE,
+        "section_tokens": SECTION_TOKENS,
+        "section_overlap_tokens": SECTION_OVERLAP_TOKENS,
+        "reduce_fan_in": SUMMARY_REDUCE_FAN_IN,
+    }
+    return result_cache.make_key("summary", transcript, SUMMARY_MODEL, params, SUMMARY_PROMPT_VERSION)
+
+
+def _transcript_prompt(transcript: str) -> str:
+    return f"Summarize the following lecture transcript into organized notes with underlined headings and bullet points:\n\n{transcript}"
+
+
+def generate_summary(client, transcript: str, refresh: bool = False) -> str:
+    """
+    Generate a formatted summary from a transcript.
+    Results are cached by transcript, model, parameters and prompt version;
+    refresh=True skips the cache lookup and regenerates.
+    """
+    cache_key = _summary_cache_key(transcript)
+    if not refresh:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡ Summary cache hit ({len(cached)} characters)")
+            return cached
+
+    summary = _generate_summary(client, transcript)
+    result_cache.put(cache_key, summary)
+    return summary
+
+
+def stream_summary(client, transcript: str, refresh: bool = False):
+    """
+    Generate the same summary as generate_summary, yielding formatted text
+    as the model writes it. Short transcripts stream from the first token;
+    long ones first summarize their sections in parallel, then stream the
+    final merge. The finished summary is stored in the result cache.
+    """
+    cache_key = _summary_cache_key(transcript)
+    if not refresh:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡ Summary cache hit ({len(cached)} characters)")
+            yield cached
+            return
+
+    formatter = SummaryFormatter()
+    raw = []
+    for piece in _stream_raw_summary(client, transcript):
+        raw.append(piece)
+        text = formatter.feed(piece)
+        if text:
+            yield text
+    text = formatter.flush()
+    if text:
+        yield text
+
+    summary = clean_summary_formatting("".join(raw))
+    print(f"✅ Summary streamed ({len(summary)} characters)")
+    result_cache.put(cache_key, summary)
+
+
+def _stream_raw_summary(client, transcript: str):
+    """Yield the unformatted summary text, streaming the last LLM call"""
+    print(f"📝 Streaming summary of transcript ({len(transcript)} characters)...")
+
+    chunks = chunk_text(transcript, SECTION_TOKENS, SECTION_OVERLAP_TOKENS)
+    if len(chunks) <= 1:
+        yield from _stream_complete(client, SYSTEM_PROMPT, _transcript_prompt(transcript))
+        return
+
+    print(f"📦 Large transcript. Splitting into {len(chunks)} chunks...")
+    with ThreadPoolExecutor(max_workers=max(1, SUMMARY_PARALLELISM), thread_name_prefix="summary") as executor:
+        raw_summaries = _summarize_sections(client, chunks, executor)
+        if not raw_summaries:
+            raise Exception("Failed to summarize any section of the transcript")
+        if SUMMARY_MODE != "map_reduce":
+            yield "\n\n".join(raw_summaries)
+            return
+        partials = _reduce_levels(client, raw_summaries, executor)
+
+    if len(partials) == 1:
+        yield partials[0]
+        return
+
+    print(f"🔀 Final merge of {len(partials)} partial notes (streaming)...")
+    started = False
+    try:
+        for piece in _stream_complete(client, REDUCE_SYSTEM_PROMPT, _merge_prompt(partials), max_tokens=2048):
+            started = True
+            yield piece
+    except Exception as e:
+        if started:
+            raise
+        # Nothing sent yet: fall back to the unmerged notes like _reduce_summaries does
+        print(f"❌ Error merging notes: {e}")
+        yield "\n\n".join(partials)
+
+
+def _generate_summary(client, transcript: str) -> str:
+    """
+    Summarize a transcript with the LLM.
+    Handles large transcripts with map-reduce: sections are summarized in
+    parallel, then merged into one document (see SUMMARY_MODE).
+    """
+    print(f"📝 Summarizing transcript ({len(transcript)} characters)...")
+    
+    # Chunking logic for large transcripts (split on sentence boundaries)
+    chunks = chunk_text(transcript, SECTION_TOKENS, SECTION_OVERLAP_TOKENS)
+    if len(chunks) > 1:
+        print(f"📦 Large transcript. Splitting into {len(chunks)} chunks...")
+
+        with ThreadPoolExecutor(max_workers=max(1, SUMMARY_PARALLELISM), thread_name_prefix="summary") as executor:
+            raw_summaries = _summarize_sections(client, chunks, executor)
+            if not raw_summaries:
+                raise Exception("Failed to summarize any section of the transcript")
+
+            if SUMMARY_MODE == "map_reduce":
+                summary = _reduce_summaries(client, raw_summaries, executor)
+            else:
+                summary = "\n\n".join(raw_summaries)
+    else:
+        # Normal Processing
+        summary = _complete(client, SYSTEM_PROMPT, _transcript_prompt(transcript))
     
     # Post-process to clean up formatting
     summary = clean_summary_formatting(summary)
@@ -84,36 +300,46 @@ Main Concepts
     return summary
 
 
+def format_summary_line(line: str) -> str:
+    """Rewrite one line of model output: markdown headings become underlined headings, bullets become •"""
+    stripped = line.strip()
+    # Convert ###, ## and # headings to underlined format
+    for marker in ('###', '##', '#'):
+        if stripped.startswith(marker):
+            heading_text = stripped.replace(marker, '').strip()
+            return heading_text + '\n' + '=' * len(heading_text)
+    # Convert * and - bullet points to •
+    if stripped.startswith('*'):
+        return line.replace('*', '•', 1)
+    if stripped.startswith('-'):
+        return line.replace('-', '•', 1)
+    return line
+
+
 def clean_summary_formatting(summary: str) -> str:
     """Clean and format the summary text"""
-    lines = summary.split('\n')
-    cleaned_lines = []
-    
-    for i, line in enumerate(lines):
-        # Convert ### headings to underlined format
-        if line.strip().startswith('###'):
-            heading_text = line.strip().replace('###', '').strip()
-            cleaned_lines.append(heading_text)
-            cleaned_lines.append('=' * len(heading_text))
-        # Convert ## headings to underlined format
-        elif line.strip().startswith('##'):
-            heading_text = line.strip().replace('##', '').strip()
-            cleaned_lines.append(heading_text)
-            cleaned_lines.append('=' * len(heading_text))
-        # Convert # headings to underlined format
-        elif line.strip().startswith('#'):
-            heading_text = line.strip().replace('#', '').strip()
-            cleaned_lines.append(heading_text)
-            cleaned_lines.append('=' * len(heading_text))
-        # Convert * bullet points to •
-        elif line.strip().startswith('*'):
-            bullet_text = line.replace('*', '•', 1)
-            cleaned_lines.append(bullet_text)
-        # Convert - bullet points to •
-        elif line.strip().startswith('-'):
-            bullet_text = line.replace('-', '•', 1)
-            cleaned_lines.append(bullet_text)
-        else:
-            cleaned_lines.append(line)
-    
-    return '\n'.join(cleaned_lines)
+    return '\n'.join(format_summary_line(line) for line in summary.split('\n'))
+
+
+class SummaryFormatter:
+    """
+    Incremental clean_summary_formatting for streamed text. Text is buffered
+    until a line is complete, then that line is formatted and released, so
+    feeding a summary in any pieces gives the same result as formatting it whole.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> str:
+        """Add streamed text; returns the formatted complete lines (may be empty)"""
+        self._buffer += text
+        if '\n' not in self._buffer:
+            return ""
+        complete, self._buffer = self._buffer.rsplit('\n', 1)
+        return clean_summary_formatting(complete) + '\n'
+
+    def flush(self) -> str:
+        """Format whatever is left after the stream ends"""
+        remainder, self._buffer = self._buffer, ""
+        return format_summary_line(remainder)
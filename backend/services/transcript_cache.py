@@ -0,0 +1,137 @@
+"""
+Transcript Cache
+Persistent, content-addressed cache of Whisper transcripts.
+Entries are keyed by the SHA-256 of the audio bytes and stored as JSON files,
+so uploading the same recording twice returns the stored transcript instead
+of calling Groq again. The cache is bounded in size and evicts the least
+recently used entries first (file mtime is refreshed on every hit).
+"""
+import os
+import json
+import uuid
+import threading
+from collections import OrderedDict
+
+from config import TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB
+
+
+class TranscriptCache:
+    """Size-bounded LRU cache of transcripts stored on disk"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # digest -> size in bytes, least recently used first
+        self._total_bytes = 0
+
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _load_index(self):
+        """Rebuild the LRU order from the files already on disk"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+
+        for _, digest, size in sorted(entries):
+            self._entries[digest] = size
+            self._total_bytes += size
+
+        if entries:
+            print(f"🗄️  Transcript cache loaded: {len(entries)} entries ({self._total_bytes / 1024 / 1024:.2f} MB)")
+
+    def get(self, digest: str):
+        """Return the cached result for an audio digest, or None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if digest not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+
+        path = self._path(digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # Mark as recently used for LRU order across restarts
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Dropping unreadable cache entry {digest}: {e}")
+            self._remove(digest)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        print(f"⚡ Transcript cache hit: {digest[:12]}")
+        return result
+
+    def put(self, digest: str, result: dict):
+        """Store a transcript result and evict old entries if over the size limit"""
+        if not self.enabled:
+            return
+
+        path = self._path(digest)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(temp_path, path)  # Atomic so readers never see a partial file
+        size = os.path.getsize(path)
+
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(digest, 0)
+            self._entries[digest] = size
+            evicted = []
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_digest, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                evicted.append(old_digest)
+
+        for old_digest in evicted:
+            self._delete_file(old_digest)
+        if evicted:
+            print(f"🧹 Evicted {len(evicted)} transcript cache entries")
+
+    def _remove(self, digest: str):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(digest, 0)
+        self._delete_file(digest)
+
+    def _delete_file(self, digest: str):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+transcript_cache = TranscriptCache(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,316 @@
+"""
+Upload Service
+Streams multipart audio uploads straight from the request body to a single
+file on disk. In the same pass it enforces the size limit, computes the
+SHA-256 used by the transcript cache and checks the container header, so
+memory and disk I/O per upload stay flat regardless of file size.
+Containers the header check does not know (WMA, AIFF, ...) are checked
+with ffprobe once written, so anything FFmpeg can decode is still accepted.
+"""
+import os
+import uuid
+import asyncio
+import hashlib
+import tempfile
+import subprocess
+from fastapi import Request
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+
+from config import MAX_UPLOAD_MB
+from metrics import track_stage
+from utils import ensure_ffmpeg
+
+# Bytes needed to recognise every format in detect_audio_format
+PROBE_BYTES = 12
+
+# Longest ffprobe check of an unrecognised upload (seconds)
+FFPROBE_TIMEOUT = 30
+
+# OpenAPI description of the multipart body, since the routes read the raw request
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+# Same, for endpoints that accept several files in the 'files' field
+MULTI_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                    "required": ["files"],
+                }
+            }
+        },
+    }
+}
+
+
+class UploadError(Exception):
+    """Base class for upload problems; status_code is the HTTP status to return"""
+    status_code = 400
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class UnsupportedAudio(UploadError):
+    status_code = 415
+
+
+def detect_audio_format(header: bytes):
+    """Identify the audio container from its first bytes, or return None"""
+    if header.startswith(b"ID3"):
+        return "mp3"
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xF6 == 0xF0:
+        return "aac"  # ADTS
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        return "mp3"  # MPEG audio frame without ID3 tag
+    if header.startswith(b"RIFF") and header[8:12] == b"WAVE":
+        return "wav"
+    if header[4:8] == b"ftyp":
+        return "mp4"
+    if header.startswith(b"OggS"):
+        return "ogg"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    if header.startswith(b"fLaC"):
+        return "flac"
+    if header.startswith(b"#!AMR"):
+        return "amr"
+    if header.startswith(b"\x00\x00\x01\xba"):
+        return "mpeg"
+    return None
+
+
+def probe_audio_codec(path: str):
+    """
+    Ask ffprobe for the codec of the first audio stream in a file.
+    Returns the codec name, False if the file has no decodable audio, or
+    None if ffprobe could not be run (the file is then left to FFmpeg later).
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path
+    ]
+    try:
+        ensure_ffmpeg()
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=FFPROBE_TIMEOUT)
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return False
+    return result.stdout.strip() or False
+
+
+class _UploadedFile:
+    """One file part being written to disk and hashed"""
+
+    def __init__(self, filename: str, path: str):
+        self.filename = filename
+        self.path = path
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.header = b""
+        self.audio_format = None
+        self.probed = False
+        self.file = open(path, "wb")
+
+    def probe(self):
+        """Identify the container from the header; unknown ones are left to verify()"""
+        self.probed = True
+        self.audio_format = detect_audio_format(self.header)
+
+    def verify(self):
+        """Check a file whose header was not recognised with ffprobe (blocking)"""
+        codec = probe_audio_codec(self.path)
+        if codec is False:
+            raise UnsupportedAudio(f"Unsupported file type for '{self.filename}'. "
+                                   "Please upload an audio file (MP3, WAV, M4A, WebM, OGG or FLAC).")
+        self.audio_format = codec or "unknown"
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "filename": self.filename,
+            "digest": self.sha256.hexdigest(),
+            "size": self.size,
+            "format": self.audio_format,
+        }
+
+
+class _UploadWriter:
+    """Multipart callbacks that write up to max_files file fields to disk while hashing them"""
+
+    def __init__(self, field_name: str, dest_dir: str, max_bytes: int, max_files: int = 1,
+                 max_total_bytes: int = None):
+        self.field_name = field_name
+        self.dest_dir = dest_dir
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_total_bytes = max_total_bytes
+        self.total_bytes = 0
+        self.files = []
+        self._current = None
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if name != self.field_name or b"filename" not in options:
+            return
+        if len(self.files) >= self.max_files:
+            if self.max_files == 1:
+                return  # Single-file uploads ignore extra file fields
+            raise UploadError(f"Too many files. At most {self.max_files} files can be uploaded at once.")
+
+        filename = options[b"filename"].decode("utf-8", "replace")
+        file_ext = os.path.splitext(filename)[1] or ".mp3"
+        self._current = _UploadedFile(filename, os.path.join(self.dest_dir, f"upload_{uuid.uuid4()}{file_ext}"))
+        self.files.append(self._current)
+
+    def on_part_data(self, data, start, end):
+        upload = self._current
+        if upload is None:
+            return
+
+        upload.size += end - start
+        if upload.size > self.max_bytes:
+            raise UploadTooLarge(f"File is too large. Maximum upload size is {self.max_bytes // (1024 * 1024)} MB.")
+        self.total_bytes += end - start
+        if self.max_total_bytes is not None and self.total_bytes > self.max_total_bytes:
+            raise UploadTooLarge(
+                f"Upload is too large. At most {self.max_total_bytes // (1024 * 1024)} MB can be uploaded at once."
+            )
+
+        chunk = memoryview(data)[start:end]
+        if not upload.probed:
+            upload.header += bytes(chunk[:PROBE_BYTES - len(upload.header)])
+            if len(upload.header) >= PROBE_BYTES:
+                upload.probe()
+
+        upload.sha256.update(chunk)
+        upload.file.write(chunk)
+
+    def on_part_end(self):
+        if self._current is not None:
+            self._current.file.close()
+            self._current = None
+
+    def close(self):
+        for upload in self.files:
+            if not upload.file.closed:
+                upload.file.close()
+
+    def discard(self):
+        self.close()
+        for upload in self.files:
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+
+
+async def ingest_upload(request: Request, field_name: str = "file", dest_dir: str = None, max_bytes: int = None) -> dict:
+    """
+    Stream a multipart/form-data upload to disk.
+    Returns a dictionary with 'path', 'filename', 'digest', 'size' and 'format' keys.
+    Raises UploadError (with an HTTP status_code) for bad, oversized or non-audio uploads.
+    """
+    uploads = await ingest_uploads(request, field_name, dest_dir, max_bytes, max_files=1)
+    return uploads[0]
+
+
+async def ingest_uploads(request: Request, field_name: str = "file", dest_dir: str = None,
+                         max_bytes: int = None, max_files: int = 1, max_total_bytes: int = None) -> list:
+    """
+    Like ingest_upload, for requests carrying up to max_files files in the same field.
+    max_bytes applies to each file and can only lower the MAX_UPLOAD_MB limit;
+    max_total_bytes, if given, applies to all files together.
+    Returns one dictionary per file, in upload order.
+    """
+    max_bytes = min(max_bytes or MAX_UPLOAD_MB * 1024 * 1024, MAX_UPLOAD_MB * 1024 * 1024)
+    dest_dir = dest_dir or tempfile.gettempdir()
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadError(f"Expected a multipart/form-data upload with a '{field_name}' field.")
+
+    # Reject obviously oversized requests before reading any of the body
+    content_length = request.headers.get("content-length")
+    content_length = int(content_length) if content_length and content_length.isdigit() else 0
+    if content_length > max_bytes * max_files + 64 * 1024:
+        raise UploadTooLarge(f"File is too large. Maximum upload size is {max_bytes // (1024 * 1024)} MB.")
+    if max_total_bytes is not None and content_length > max_total_bytes + 64 * 1024:
+        raise UploadTooLarge(
+            f"Upload is too large. At most {max_total_bytes // (1024 * 1024)} MB can be uploaded at once."
+        )
+
+    writer = _UploadWriter(field_name, dest_dir, max_bytes, max_files, max_total_bytes)
+    parser = MultipartParser(boundary, writer.callbacks())
+    try:
+        with track_stage("upload_ingest"):
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+
+        if not writer.files:
+            raise UploadError(f"No '{field_name}' file found in the upload.")
+        for upload in writer.files:
+            if not upload.probed:
+                upload.probe()  # Files shorter than PROBE_BYTES
+            if upload.audio_format is None:
+                await asyncio.to_thread(upload.verify)
+    except Exception:
+        writer.discard()
+        raise
+    finally:
+        writer.close()
+
+    return [upload.to_dict() for upload in writer.files]
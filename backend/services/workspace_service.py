@@ -0,0 +1,260 @@
+"""
+Workspace Service
+Gives every request, job and batch item its own temp directory instead of
+scattering files across the system temp dir. A workspace holds everything
+the work writes (upload or download, compacted audio, FFmpeg chunks) and is
+deleted in one go when the work finishes.
+
+- Each workspace has a byte quota; going over it fails that job only.
+  Directories kept outside it (a background job's checkpoint) can be
+  included so they count against the same quota.
+- Chunk files can live on a separate, RAM-backed directory (tmpfs).
+- New work is refused (503) while the disk is below the free space watermark.
+- A background reaper deletes workspaces left behind by a crashed worker.
+  Live workspaces are touched on every sweep, so anything not touched for
+  WORKSPACE_ORPHAN_SECONDS belongs to no running process. Only names made
+  by create() are deleted, so the roots can be shared directories.
+"""
+import os
+import re
+import time
+import uuid
+import shutil
+import threading
+
+from config import (
+    WORKSPACE_DIR,
+    WORKSPACE_QUOTA_MB,
+    WORKSPACE_CHUNK_DIR,
+    WORKSPACE_MIN_FREE_MB,
+    WORKSPACE_ORPHAN_SECONDS,
+    WORKSPACE_REAP_INTERVAL_SECONDS,
+)
+
+
+# Directory names made by WorkspaceManager.create(): <kind>_<uuid4 hex>
+WORKSPACE_NAME = re.compile(r"[a-z_]+_[0-9a-f]{32}")
+
+
+class WorkspaceError(Exception):
+    """Base class for workspace problems; status_code is the HTTP status to return"""
+    status_code = 503
+
+
+class InsufficientDiskSpace(WorkspaceError):
+    status_code = 503
+
+
+class WorkspaceQuotaExceeded(WorkspaceError):
+    status_code = 413
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Deleted while walking
+    return total
+
+
+class Workspace:
+    """A directory owned by one piece of work, with a byte quota"""
+
+    def __init__(self, manager, workspace_id: str, directory: str, chunk_dir: str, quota_bytes: int):
+        self.manager = manager
+        self.id = workspace_id
+        self.directory = directory
+        self.chunk_dir = chunk_dir  # Inside the workspace unless WORKSPACE_CHUNK_DIR is set
+        self.quota_bytes = quota_bytes  # 0 means no quota
+        self.included = []  # Other directories counted against the quota (not deleted on release)
+        self.released = False
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def adopt(self, path: str) -> str:
+        """Move a file into the workspace; returns the new path"""
+        new_path = self.path(os.path.basename(path))
+        shutil.move(path, new_path)
+        return new_path
+
+    def include(self, directory: str):
+        """Count a directory the work writes outside the workspace (e.g. a job checkpoint) against the quota"""
+        if directory not in self.included:
+            self.included.append(directory)
+
+    def usage(self) -> int:
+        """Bytes currently stored in the workspace (chunk directory and included directories too)"""
+        usage = _directory_size(self.directory)
+        if not self.chunk_dir.startswith(self.directory + os.sep):
+            usage += _directory_size(self.chunk_dir)
+        for directory in self.included:
+            usage += _directory_size(directory)
+        return usage
+
+    def remaining_bytes(self):
+        """Bytes left under the quota, or None if there is no quota"""
+        if not self.quota_bytes:
+            return None
+        return max(0, self.quota_bytes - self.usage())
+
+    def check_quota(self):
+        """Raise WorkspaceQuotaExceeded if the workspace uses more than its quota"""
+        if self.quota_bytes and self.usage() > self.quota_bytes:
+            raise WorkspaceQuotaExceeded(
+                f"This lecture needs more than {self.quota_bytes // (1024 * 1024)} MB of temporary disk space."
+            )
+
+    def touch(self):
+        for path in (self.directory, self.chunk_dir):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def release(self):
+        """Delete the workspace and everything in it"""
+        if self.released:
+            return
+        self.released = True
+        shutil.rmtree(self.chunk_dir, ignore_errors=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.manager._forget(self)
+        print(f"🧹 Cleaned up workspace {self.id}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class WorkspaceManager:
+    """Creates workspaces, enforces the free space watermark and reaps orphans"""
+
+    def __init__(self, root: str, chunk_root: str, quota_bytes: int, min_free_bytes: int,
+                 orphan_seconds: int, reap_interval: int):
+        self.root = root
+        self.chunk_root = chunk_root or None
+        self.quota_bytes = quota_bytes
+        self.min_free_bytes = min_free_bytes
+        self.orphan_seconds = orphan_seconds
+        self.reap_interval = reap_interval
+        self.reaped = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def free_bytes(self) -> int:
+        os.makedirs(self.root, exist_ok=True)
+        return shutil.disk_usage(self.root).free
+
+    def check_free_space(self, path: str = None):
+        """Raise InsufficientDiskSpace if the disk (holding path, by default the workspace root) is below the watermark"""
+        if path:
+            os.makedirs(path, exist_ok=True)
+            free = shutil.disk_usage(path).free
+        else:
+            free = self.free_bytes()
+        if free < self.min_free_bytes:
+            print(f"⚠️  Refusing new work: only {free / 1024 / 1024:.0f} MB of disk left")
+            raise InsufficientDiskSpace("The server is low on disk space. Please try again later.")
+
+    def create(self, kind: str) -> Workspace:
+        """
+        Create an empty workspace for one piece of work.
+        Raises InsufficientDiskSpace if the disk is below the watermark.
+        """
+        self.check_free_space()
+
+        workspace_id = f"{kind}_{uuid.uuid4().hex}"
+        directory = os.path.join(self.root, workspace_id)
+        if self.chunk_root:
+            chunk_dir = os.path.join(self.chunk_root, workspace_id)
+        else:
+            chunk_dir = os.path.join(directory, "chunks")
+        os.makedirs(directory)
+        os.makedirs(chunk_dir)
+
+        workspace = Workspace(self, workspace_id, directory, chunk_dir, self.quota_bytes)
+        with self._lock:
+            self._active[workspace_id] = workspace
+        return workspace
+
+    def _forget(self, workspace: Workspace):
+        with self._lock:
+            self._active.pop(workspace.id, None)
+
+    def reap(self) -> int:
+        """
+        Touch every live workspace, then delete workspace directories (in this
+        or any other worker's root) that nobody touched within the orphan age.
+        Anything else in the roots is left alone.
+        Returns the number of directories removed.
+        """
+        with self._lock:
+            active = list(self._active.values())
+        active_ids = {workspace.id for workspace in active}
+        for workspace in active:
+            workspace.touch()
+
+        cutoff = time.time() - self.orphan_seconds
+        removed = 0
+        for root in (self.root, self.chunk_root):
+            if not root or not os.path.isdir(root):
+                continue
+            for name in os.listdir(root):
+                if not WORKSPACE_NAME.fullmatch(name):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    orphaned = name not in active_ids and os.path.getmtime(path) < cutoff
+                except OSError:
+                    continue
+                if orphaned:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+        if removed:
+            self.reaped += removed
+            print(f"🧹 Reaped {removed} orphaned workspace directories")
+        return removed
+
+    def start_reaper(self):
+        """Run reap() now and then every reap interval in a daemon thread"""
+        if self._reaper:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.reap()
+                except Exception as e:
+                    print(f"⚠️  Workspace reaper failed: {e}")
+                time.sleep(self.reap_interval)
+
+        self._reaper = threading.Thread(target=loop, name="workspace-reaper", daemon=True)
+        self._reaper.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = len(self._active)
+        return {
+            "active": active,
+            "free_mb": self.free_bytes() // (1024 * 1024),
+            "min_free_mb": self.min_free_bytes // (1024 * 1024),
+            "quota_mb": self.quota_bytes // (1024 * 1024),
+            "reaped": self.reaped,
+        }
+
+
+workspace_manager = WorkspaceManager(
+    WORKSPACE_DIR,
+    WORKSPACE_CHUNK_DIR,
+    WORKSPACE_QUOTA_MB * 1024 * 1024,
+    WORKSPACE_MIN_FREE_MB * 1024 * 1024,
+    WORKSPACE_ORPHAN_SECONDS,
+    WORKSPACE_REAP_INTERVAL_SECONDS,
+)
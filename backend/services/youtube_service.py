@@ -1,14 +1,22 @@
 import os
 import uuid
 import tempfile
-import yt_dlp
 
-def download_audio_from_url(url: str, preferred_codec: str = 'm4a') -> str:
+from lazy import lazy_import
+from metrics import track_stage
+from utils import ensure_ffmpeg
+
+yt_dlp = lazy_import("yt_dlp")
+
+def download_audio_from_url(url: str, preferred_codec: str = 'm4a', output_dir: str = None,
+                            max_bytes: int = None) -> str:
     """
     Download audio from a URL (YouTube or other supported platforms).
+    The file is written to output_dir (default: the system temp dir); downloads
+    larger than max_bytes are refused.
     Returns the path to the downloaded file.
     """
-    temp_filename = os.path.join(tempfile.gettempdir(), f"temp_{uuid.uuid4()}.{preferred_codec}")
+    temp_filename = os.path.join(output_dir or tempfile.gettempdir(), f"temp_{uuid.uuid4()}.{preferred_codec}")
     
     ydl_opts = {
         'format': 'bestaudio/best',
@@ -35,32 +43,65 @@ def download_audio_from_url(url: str, preferred_codec: str = 'm4a') -> str:
         },
         'age_limit': None,  # Bypass age restrictions
         'nocheckcertificate': True,
+        'max_filesize': max_bytes,
     }
 
     print(f"⬇️  Downloading audio from URL...")
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    ensure_ffmpeg()
+    with track_stage("ytdlp_download"), yt_dlp().YoutubeDL(ydl_opts) as ydl:
         ydl.download([url])
-    
+
+    if not os.path.exists(temp_filename):
+        raise Exception(_missing_download_message(max_bytes))
+
     print(f"✅ Audio downloaded to {temp_filename}")
     return temp_filename
 
 
-def download_audio_from_generic_link(url: str) -> str:
+def _missing_download_message(max_bytes: int = None) -> str:
+    # yt-dlp skips files over max_filesize without raising
+    if max_bytes:
+        return f"Downloaded file not found (yt-dlp failed to create file, or it is larger than {max_bytes // (1024 * 1024)} MB)"
+    return "Downloaded file not found (yt-dlp failed to create file)"
+
+
+class _OutputTracker:
+    """yt-dlp hooks that record where the downloaded (and post-processed) file ended up"""
+
+    def __init__(self):
+        self.path = None
+
+    def on_download(self, d):
+        if d.get("status") == "finished":
+            self.path = d.get("filename") or self.path
+
+    def on_postprocess(self, d):
+        if d.get("status") == "finished":
+            self.path = d.get("info_dict", {}).get("filepath") or self.path
+
+
+def download_audio_from_generic_link(url: str, output_dir: str = None, max_bytes: int = None) -> str:
     """
-    Download audio from a generic link with dynamic extension handling.
+    Download audio from a generic link, keeping the source's own audio codec.
+    Audio-only downloads in a common format are used as-is; otherwise the
+    audio stream is copied into a matching container (no re-encoding).
+    The file is written to output_dir (default: the system temp dir); downloads
+    larger than max_bytes are refused.
     Returns the path to the downloaded file.
     """
     job_id = str(uuid.uuid4())
-    temp_base = os.path.join(tempfile.gettempdir(), f"temp_{job_id}")
+    temp_base = os.path.join(output_dir or tempfile.gettempdir(), f"temp_{job_id}")
+    output = _OutputTracker()
     
     ydl_opts = {
         'format': 'bestaudio/best',
         'outtmpl': f"{temp_base}.%(ext)s",
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
+            'preferredcodec': 'best',
         }],
+        'progress_hooks': [output.on_download],
+        'postprocessor_hooks': [output.on_postprocess],
         'quiet': True,
         'no_warnings': True,
         # Enhanced bot detection bypass
@@ -79,21 +120,17 @@ def download_audio_from_generic_link(url: str) -> str:
         },
         'age_limit': None,  # Bypass age restrictions
         'nocheckcertificate': True,
+        'max_filesize': max_bytes,
     }
 
     print("⬇️  Downloading audio from link...")
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    ensure_ffmpeg()
+    with track_stage("ytdlp_download"), yt_dlp().YoutubeDL(ydl_opts) as ydl:
         ydl.download([url])
     
-    # Find the generated file in /tmp
-    final_filename = None
-    for file in os.listdir(tempfile.gettempdir()):
-        if file.startswith(os.path.basename(temp_base)):
-            final_filename = os.path.join(tempfile.gettempdir(), file)
-            break
-    
-    if not final_filename:
-        raise Exception("Downloaded file not found (yt-dlp failed to create file)")
+    final_filename = output.path
+    if not final_filename or not os.path.exists(final_filename):
+        raise Exception(_missing_download_message(max_bytes))
 
     print(f"✅ Audio downloaded to {final_filename}")
     return final_filename
@@ -6,11 +6,41 @@ Extracts transcripts from YouTube videos using multiple strategies:
 
 The Supadata API requires a SUPADATA_API_KEY environment variable.
 Free tier: 100 requests/month at https://supadata.ai
+
+Transcripts are cached per video id, and concurrent requests for the same
+video share a single fetch, so a link shared with a class costs one request.
+
+By default the strategies are hedged: the direct API is started if Supadata
+has not answered within YOUTUBE_HEDGE_DELAY_SECONDS, and the first valid
+transcript wins (see YOUTUBE_TRANSCRIPT_STRATEGY).
 """
 import os
 import re
-import requests
-from youtube_transcript_api import YouTubeTranscriptApi
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import (
+    YOUTUBE_TRANSCRIPT_TTL_SECONDS,
+    YOUTUBE_TRANSCRIPT_CACHE_SIZE,
+    YOUTUBE_TRANSCRIPT_STRATEGY,
+    YOUTUBE_HEDGE_DELAY_SECONDS,
+)
+from utils import TTLCache, SingleFlight, get_http_session
+from lazy import Lazy
+from metrics import track_stage
+
+_transcript_cache = TTLCache(YOUTUBE_TRANSCRIPT_TTL_SECONDS, YOUTUBE_TRANSCRIPT_CACHE_SIZE)
+_in_flight = SingleFlight()
+
+# Runs the strategies of hedged/raced fetches; a slow loser keeps its thread until it times out
+_strategy_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="yt-transcript")
+
+def _create_ytt_api():
+    from youtube_transcript_api import YouTubeTranscriptApi
+    # Reuses keep-alive connections to YouTube across requests
+    return YouTubeTranscriptApi(http_client=get_http_session())
+
+
+_ytt_api = Lazy("youtube_transcript_api", _create_ytt_api)
 
 
 def extract_video_id(url: str) -> str:
@@ -43,7 +73,7 @@ def _fetch_via_supadata(url: str) -> str:
     
     print(f"[YT-Transcript] Trying Supadata API...")
     
-    response = requests.get(
+    response = get_http_session().get(
         "https://api.supadata.ai/v1/youtube/transcript",
         params={"url": url, "text": "true"},
         headers={"x-api-key": api_key},
@@ -80,13 +110,11 @@ def _fetch_via_direct_api(url: str) -> str:
     video_id = extract_video_id(url)
     print(f"[YT-Transcript] Trying direct API for video ID: {video_id}")
     
-    ytt_api = YouTubeTranscriptApi()
-    
     try:
-        transcript = ytt_api.fetch(video_id, languages=['en'])
+        transcript = _ytt_api().fetch(video_id, languages=['en'])
     except Exception:
         print("[YT-Transcript] English not found, trying other languages...")
-        transcript = ytt_api.fetch(video_id)
+        transcript = _ytt_api().fetch(video_id)
     
     raw_data = transcript.to_raw_data()
     full_transcript = " ".join([entry['text'] for entry in raw_data])
@@ -97,9 +125,41 @@ def _fetch_via_direct_api(url: str) -> str:
 
 def get_youtube_transcript(url: str) -> str:
     """
-    Get transcript from YouTube video. Tries multiple strategies:
-    1. Supadata API (works from cloud servers)
-    2. Direct youtube-transcript-api (works locally)
+    Get transcript from YouTube video, from the cache when possible.
+    Concurrent calls for the same video wait for one shared fetch.
+    """
+    try:
+        video_id = extract_video_id(url)
+    except ValueError:
+        return _fetch_transcript(url)  # Unusual URL format, let the strategies handle it
+
+    cached = _transcript_cache.get(video_id)
+    if cached is not None:
+        print(f"[YT-Transcript] Cache hit for video ID: {video_id}")
+        return cached
+
+    def fetch():
+        with track_stage("caption_fetch"):
+            transcript = _fetch_transcript(url)
+        _transcript_cache.put(video_id, transcript)
+        return transcript
+
+    return _in_flight.do(video_id, fetch)
+
+
+# Strategies in order of preference
+STRATEGIES = [
+    ("Supadata", _fetch_via_supadata),      # Works on cloud servers
+    ("Direct API", _fetch_via_direct_api),  # Works locally
+]
+
+
+def _fetch_transcript(url: str) -> str:
+    """
+    Fetch transcript from YouTube video using the configured strategy mode:
+    - sequential: Supadata, then the direct API if it fails
+    - hedged: also start the direct API if Supadata is slow
+    - race: start both at once
     
     Args:
         url: YouTube video URL
@@ -107,23 +167,67 @@ def get_youtube_transcript(url: str) -> str:
     Returns:
         str: Full transcript text
     """
+    if YOUTUBE_TRANSCRIPT_STRATEGY == "sequential":
+        errors = []
+        for name, strategy in STRATEGIES:
+            try:
+                return strategy(url)
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                print(f"[YT-Transcript] {name} failed: {e}")
+        _raise_friendly_error(errors)
+
+    delay = 0 if YOUTUBE_TRANSCRIPT_STRATEGY == "race" else YOUTUBE_HEDGE_DELAY_SECONDS
+    return _fetch_hedged(url, delay)
+
+
+def _fetch_hedged(url: str, delay: float) -> str:
+    """
+    Start the strategies one after another, each `delay` seconds after the
+    previous one (or immediately once it fails), and return the first
+    transcript that comes back. Tail latency is bounded by the faster provider.
+    """
     errors = []
-    
-    # Strategy 1: Supadata managed API (works on cloud servers)
-    try:
-        return _fetch_via_supadata(url)
-    except Exception as e:
-        errors.append(f"Supadata: {e}")
-        print(f"[YT-Transcript] Supadata failed: {e}")
-    
-    # Strategy 2: Direct youtube-transcript-api (works locally)
-    try:
-        return _fetch_via_direct_api(url)
-    except Exception as e:
-        errors.append(f"Direct API: {e}")
-        print(f"[YT-Transcript] Direct API failed: {e}")
-    
-    # All strategies failed
+    pending = {}
+    next_strategy = 0
+
+    def start_next():
+        nonlocal next_strategy
+        name, strategy = STRATEGIES[next_strategy]
+        pending[_strategy_executor.submit(strategy, url)] = name
+        next_strategy += 1
+
+    start_next()
+    while pending:
+        more_to_start = next_strategy < len(STRATEGIES)
+        done, _ = wait(pending, timeout=delay if more_to_start else None, return_when=FIRST_COMPLETED)
+
+        if not done:
+            print(f"[YT-Transcript] No answer after {delay}s, starting {STRATEGIES[next_strategy][0]} as well...")
+            start_next()
+            continue
+
+        for future in done:
+            name = pending.pop(future)
+            try:
+                transcript = future.result()
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                print(f"[YT-Transcript] {name} failed: {e}")
+                continue
+            if pending:
+                print(f"[YT-Transcript] {name} answered first")
+            return transcript
+
+        # A strategy failed: start the next one right away instead of waiting out the delay
+        if next_strategy < len(STRATEGIES):
+            start_next()
+
+    _raise_friendly_error(errors)
+
+
+def _raise_friendly_error(errors: list):
+    """Turn the per-strategy errors into a message the user can act on"""
     error_summary = " | ".join(errors)
     print(f"[YT-Transcript] All strategies failed: {error_summary}")
     
@@ -1,31 +1,115 @@
 import time
+import hashlib
+import threading
+from collections import OrderedDict
 
-def retry_with_backoff(func, max_retries=3, initial_delay=2):
+from config import HTTP_POOL_SIZE
+from lazy import Lazy
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file on disk"""
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class TTLCache:
+    """Thread-safe in-memory cache whose entries expire after ttl_seconds"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SingleFlight:
     """
-    Retry a function with exponential backoff.
-    Handles Groq API rate limits and temporary failures (502 errors).
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function, later callers wait for it and share its result (or exception).
     """
-    for attempt in range(max_retries):
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
         try:
-            return func()
+            call.result = func()
+            return call.result
         except Exception as e:
-            error_msg = str(e)
-            # Check if it's a rate limit or server error
-            is_retryable = (
-                "502" in error_msg or 
-                "503" in error_msg or 
-                "429" in error_msg or 
-                "rate" in error_msg.lower() or
-                "InternalServerError" in str(type(e).__name__)
-            )
-            
-            if is_retryable and attempt < max_retries - 1:
-                delay = initial_delay * (2 ** attempt)  # Exponential backoff
-                print(f"API error (attempt {attempt + 1}/{max_retries}): {type(e).__name__}")
-                print(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            else:
-                # Not retryable or last attempt
-                raise e
-    
-    raise Exception("Max retries exceeded")
\ No newline at end of file
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def create_http_session(pool_size: int = HTTP_POOL_SIZE):
+    """Create a requests session that keeps up to pool_size connections per host alive"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by all outbound HTTP calls (Supadata, YouTube) so connections are reused
+get_http_session = Lazy("requests", create_http_session)
+
+
+def _add_ffmpeg_paths():
+    # Imported here since static_ffmpeg pulls in requests and may download binaries;
+    # weak=True keeps a system FFmpeg on PATH, so nothing is downloaded when one exists
+    import static_ffmpeg
+    static_ffmpeg.add_paths(weak=True)
+
+
+# Call before running FFmpeg/ffprobe or yt-dlp post-processing
+ensure_ffmpeg = Lazy("ffmpeg", _add_ffmpeg_paths)